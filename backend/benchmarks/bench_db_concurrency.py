@@ -0,0 +1,133 @@
+"""
+Event-loop concurrency benchmark: sync Session vs AsyncSession.
+
+Runs the /status workload (load an Emergency by id, read its fields)
+under parallel load on one event loop. The workload runs once with the
+blocking SessionLocal, as the routes did before, and once with
+AsyncSessionLocal. A heartbeat task measures how long the loop stalls,
+because those stalls are what freeze WebSocket traffic and other
+requests.
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_concurrency --requests 2000 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# Benchmark against a throwaway database, never the real one
+_DB_DIR = tempfile.mkdtemp(prefix="golden_hour_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}")
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from src.database.db import (  # noqa: E402
+    AsyncSessionLocal, Emergency, SessionLocal, async_engine, init_db,
+)
+
+
+def seed(rows: int) -> list:
+    db = SessionLocal()
+    try:
+        db.add_all(
+            Emergency(
+                location="bench",
+                latitude=28.6 + i * 1e-4,
+                longitude=77.2,
+                symptoms=["chest_pain"],
+                age_group="60+",
+                status="PROCESSING",
+            )
+            for i in range(rows)
+        )
+        db.commit()
+        return [row_id for (row_id,) in db.query(Emergency.id).all()]
+    finally:
+        db.close()
+
+
+async def sync_status(emergency_id: int):
+    # What the handlers did before: blocking Session inside async def
+    db = SessionLocal()
+    try:
+        emergency = db.query(Emergency).filter(Emergency.id == emergency_id).first()
+        return emergency.status
+    finally:
+        db.close()
+
+
+async def async_status(emergency_id: int):
+    async with AsyncSessionLocal() as db:
+        emergency = await db.get(Emergency, emergency_id)
+        return emergency.status
+
+
+async def heartbeat(interval_s: float, stalls: list, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval_s
+        await asyncio.sleep(interval_s)
+        stalls.append(max(loop.time() - expected, 0.0))
+
+
+async def run_variant(name: str, handler, ids: list, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(ids[i % len(ids)])
+            latencies.append(time.perf_counter() - started)
+
+    stalls, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(0.001, stalls, stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await beat
+
+    latencies.sort()
+    return {
+        "variant": name,
+        "throughput_rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max_loop_stall_ms": max(stalls, default=0.0) * 1000,
+        "heartbeats": len(stalls),
+    }
+
+
+async def main(requests: int, concurrency: int, rows: int):
+    init_db()
+    ids = seed(rows)
+
+    results = [
+        await run_variant("sync Session (before)", sync_status, ids, requests, concurrency),
+        await run_variant("AsyncSession (after)", async_status, ids, requests, concurrency),
+    ]
+    await async_engine.dispose()
+
+    print(f"\n📊 {requests} requests, concurrency {concurrency}, {rows} rows")
+    print(f"{'variant':<24}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max stall ms':>14}{'beats':>8}")
+    for r in results:
+        print(
+            f"{r['variant']:<24}{r['throughput_rps']:>10.0f}{r['p50_ms']:>10.2f}"
+            f"{r['p99_ms']:>10.2f}{r['max_loop_stall_ms']:>14.2f}{r['heartbeats']:>8}"
+        )
+    print("\nHeartbeats = 1 ms ticks the loop managed to serve during the run;"
+          " the sync variant starves them because every query blocks the loop.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.rows))
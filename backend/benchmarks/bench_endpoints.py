@@ -0,0 +1,353 @@
+"""
+Endpoint benchmark suite against main.app, fully in-process and offline.
+
+Drives /api/triage, /api/hospitals/{id}, /api/status/{id}, the legacy
+/api/emergency/create (httpx ASGITransport) and /ws/emergency/{id}
+(Starlette TestClient) with OSRM, Nominatim and SMTP replaced by the
+deterministic stand-ins in benchmarks/stubs.py. Each scenario reports
+throughput and p50/p90/p99 latency, and is compared against the stored
+baselines; the exit status is 1 when a scenario regressed beyond the
+tolerance.
+
+Absolute req/s and milliseconds only mean something on the machine that
+recorded them, so every run also times a fixed CPU-bound calibration
+workload. The baseline stores its own calibration time, and the baseline
+numbers are scaled by the ratio of the two before comparing: a machine
+that is twice as slow is held to half the baseline throughput, not
+reported as a regression.
+
+ASGITransport returns only after the app call finishes, so /api/triage
+timings include the background orchestration it schedules.
+
+Usage (from backend/):
+    python -m benchmarks.bench_endpoints
+    python -m benchmarks.bench_endpoints --scenarios status,hospitals --requests 1000
+    python -m benchmarks.bench_endpoints --update-baseline
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Benchmark against a throwaway database, never the real one
+_DB_DIR = tempfile.mkdtemp(prefix="golden_hour_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+import httpx  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from benchmarks.stubs import UpstreamStubs  # noqa: E402
+from src.database.db import Emergency, SessionLocal  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+SCENARIOS = ("triage", "hospitals", "status", "emergency_create", "websocket")
+
+# Central Delhi, where the bundled hospitals are
+DELHI_LAT, DELHI_LNG, SPREAD_DEG = 28.60, 77.20, 0.15
+SYMPTOMS = ["chest pain", "severe bleeding", "fever", "fracture", "moderate pain", "dizziness"]
+
+
+def random_location(rng: random.Random) -> dict:
+    return {
+        "lat": round(DELHI_LAT + rng.uniform(-SPREAD_DEG, SPREAD_DEG), 6),
+        "lng": round(DELHI_LNG + rng.uniform(-SPREAD_DEG, SPREAD_DEG), 6),
+    }
+
+
+def triage_body(rng: random.Random) -> dict:
+    return {
+        "patientName": "Bench Patient",
+        "age": rng.choice(["0-18", "19-40", "40-45", "60+"]),
+        "gender": "other",
+        "contact": "9999999999",
+        "symptoms": rng.choice(SYMPTOMS),
+        "vitals": {"bloodPressure": "120/80", "heartRate": 90, "oxygenLevel": 97},
+        "location": random_location(rng),
+    }
+
+
+def legacy_body(rng: random.Random) -> dict:
+    return {
+        "location": random_location(rng),
+        "symptoms": [rng.choice(SYMPTOMS).replace(" ", "_")],
+        "vitals": {"heartRate": 90},
+        "age": rng.randint(5, 85),
+        "description": "benchmark",
+        "contact_email": "bench@example.com",
+    }
+
+
+def seed_emergencies(rows: int, rng: random.Random) -> list:
+    db = SessionLocal()
+    try:
+        emergencies = [
+            Emergency(
+                location="bench",
+                latitude=location["lat"],
+                longitude=location["lng"],
+                symptoms=["chest_pain"],
+                age_group="60+",
+                status="REGISTERED",
+            )
+            for location in (random_location(rng) for _ in range(rows))
+        ]
+        db.add_all(emergencies)
+        db.commit()
+        return [e.id for e in emergencies]
+    finally:
+        db.close()
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * q), len(sorted_values) - 1)]
+
+
+def summarize(name: str, latencies: list, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    total = len(latencies) + errors
+    return {
+        "scenario": name,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 0.90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def run_http(name: str, client: httpx.AsyncClient, make_request, requests: int,
+                   concurrency: int, warmup: int) -> dict:
+    # Unmeasured warm-up: connection pools, caches, first-query planning
+    for i in range(warmup):
+        try:
+            await make_request(client, i)
+        except Exception:
+            pass
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await make_request(client, i)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(name, latencies, errors, time.perf_counter() - started)
+
+
+async def run_http_scenarios(names: list, args, rng: random.Random) -> list:
+    results = []
+    async with main.app.router.lifespan_context(main.app):
+        ids = seed_emergencies(args.rows, rng)
+        bodies = {
+            "triage": [triage_body(rng) for _ in range(args.requests + args.warmup)],
+            "emergency_create": [legacy_body(rng) for _ in range(args.requests + args.warmup)],
+        }
+        requests = {
+            "triage": lambda c, i: c.post("/api/triage", json=bodies["triage"][-1 - i]),
+            "hospitals": lambda c, i: c.get(f"/api/hospitals/{ids[i % len(ids)]}"),
+            "status": lambda c, i: c.get(f"/api/status/{ids[i % len(ids)]}"),
+            "emergency_create": lambda c, i: c.post(
+                "/api/emergency/create", json=bodies["emergency_create"][-1 - i]
+            ),
+        }
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in names:
+                results.append(
+                    await run_http(
+                        name, client, requests[name], args.requests, args.concurrency, args.warmup
+                    )
+                )
+    return results
+
+
+def run_websocket(messages: int, rng: random.Random) -> dict:
+    """Round trips on one connection: send a request, wait for its final message."""
+    latencies, errors = [], 0
+    with TestClient(main.app) as client:
+        with client.websocket_connect("/ws/emergency/bench") as ws:
+            started = time.perf_counter()
+            for _ in range(messages):
+                sent = time.perf_counter()
+                ws.send_text(json.dumps(legacy_body(rng)))
+                while True:
+                    message = json.loads(ws.receive_text())
+                    if message.get("status") in ("completed", "error"):
+                        break
+                if message["status"] == "completed":
+                    latencies.append(time.perf_counter() - sent)
+                else:
+                    errors += 1
+            elapsed = time.perf_counter() - started
+    return summarize("websocket", latencies, errors, elapsed)
+
+
+def calibrate(rounds: int = 7) -> float:
+    """
+    Milliseconds for a fixed CPU-bound workload shaped like the request
+    path (JSON encode/decode, dict churn, SQLite inserts and an indexed
+    read): best of `rounds` after one unmeasured round, so neither a cold
+    start nor a noisy neighbour skews it.
+    """
+    record = {"id": 0, "symptoms": SYMPTOMS, "vitals": {"heartRate": 90}, "lat": DELHI_LAT}
+    best = float("inf")
+    for round_ in range(rounds + 1):
+        started = time.perf_counter()
+        db = sqlite3.connect(":memory:")
+        db.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, body TEXT)")
+        for i in range(3000):
+            record["id"] = i
+            body = json.dumps(record)
+            db.execute("INSERT INTO t VALUES (?, ?)", (i, body))
+            json.loads(body)
+        for i in range(0, 3000, 3):
+            db.execute("SELECT body FROM t WHERE id = ?", (i,)).fetchone()
+        db.close()
+        if round_:
+            best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 2)
+
+
+def machine_scale(baseline: dict, calibration_ms: float) -> float:
+    """How much slower this machine is than the baseline's (1.0 without calibration data)."""
+    base = baseline.get("calibration_ms")
+    return calibration_ms / base if base else 1.0
+
+
+def compare(results: list, baseline: dict, tolerance: float, scale: float = 1.0) -> list:
+    """
+    Scenarios slower (p50/p99) or lower-throughput than baseline beyond
+    tolerance, with baseline latencies multiplied and throughput divided by
+    `scale` (see machine_scale).
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get("scenarios", {}).get(result["scenario"])
+        if not base:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            expected = round(base[key] * scale, 2)
+            if base[key] and result[key] > expected * (1 + tolerance):
+                regressions.append(f"{result['scenario']}: {key} {result[key]} > baseline {expected}")
+        expected_rps = round(base["throughput_rps"] / scale, 1)
+        if result["throughput_rps"] < expected_rps * (1 - tolerance):
+            regressions.append(
+                f"{result['scenario']}: throughput {result['throughput_rps']} "
+                f"< baseline {expected_rps}"
+            )
+        if result["errors"] > base.get("errors", 0):
+            regressions.append(f"{result['scenario']}: {result['errors']} errors")
+    return regressions
+
+
+def print_table(results: list, baseline: dict):
+    scenarios = baseline.get("scenarios", {})
+    print(f"\n{'scenario':<18}{'reqs':>7}{'errs':>6}{'req/s':>10}{'p50 ms':>10}"
+          f"{'p90 ms':>10}{'p99 ms':>10}{'base p99':>10}")
+    for r in results:
+        base_p99 = scenarios.get(r["scenario"], {}).get("p99_ms", "-")
+        print(f"{r['scenario']:<18}{r['requests']:>7}{r['errors']:>6}{r['throughput_rps']:>10.1f}"
+              f"{r['p50_ms']:>10.2f}{r['p90_ms']:>10.2f}{r['p99_ms']:>10.2f}{base_p99:>10}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--ws-messages", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    parser.add_argument("--rows", type=int, default=500, help="emergencies seeded for reads")
+    parser.add_argument("--osrm-latency-ms", type=float, default=20)
+    parser.add_argument("--nominatim-latency-ms", type=float, default=50)
+    parser.add_argument("--smtp-latency-ms", type=float, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="allowed relative slowdown before a scenario counts as regressed")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's own log output")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    stubs = UpstreamStubs(args.osrm_latency_ms, args.nominatim_latency_ms, args.smtp_latency_ms)
+    stubs.install()
+    rng = random.Random(args.seed)
+    params = {k: v for k, v in vars(args).items()
+              if k not in ("scenarios", "baseline", "tolerance", "update_baseline", "verbose")}
+
+    calibration_ms = calibrate()
+    app_log = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with app_log:
+        results = asyncio.run(
+            run_http_scenarios([n for n in names if n != "websocket"], args, rng)
+        )
+        if "websocket" in names:
+            results.append(run_websocket(args.ws_messages, rng))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"\n📊 {args.requests} requests/scenario, concurrency {args.concurrency}; upstream stubs "
+          f"OSRM {args.osrm_latency_ms} ms, Nominatim {args.nominatim_latency_ms} ms, "
+          f"SMTP {args.smtp_latency_ms} ms")
+    print_table(results, baseline)
+    scale = machine_scale(baseline, calibration_ms)
+    print(f"\nCalibration {calibration_ms} ms (baseline {baseline.get('calibration_ms', '-')} ms, "
+          f"scale x{scale:.2f})")
+    print(f"\nUpstream calls served by stubs: {stubs.calls}")
+
+    if args.update_baseline:
+        scenarios = dict(baseline.get("scenarios", {}))
+        scenarios.update({r["scenario"]: r for r in results})
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {"params": params, "calibration_ms": calibration_ms, "scenarios": scenarios},
+                f, indent=2,
+            )
+            f.write("\n")
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return 0
+
+    if baseline.get("params") and baseline["params"] != params:
+        print("\n⚠️  Parameters differ from the baseline run; comparison is indicative only")
+    regressions = compare(results, baseline, args.tolerance, scale)
+    for line in regressions:
+        print(f"❌ {line}")
+    if baseline and not regressions:
+        print(f"\n✅ Within {args.tolerance:.0%} of baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
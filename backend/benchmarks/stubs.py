@@ -0,0 +1,82 @@
+"""
+Deterministic offline stand-ins for the upstream services.
+
+OSRM (route + table), Nominatim and SMTP answer locally after a fixed,
+configurable delay. Distances are haversine x detour factor and durations
+use the ambulance speed profile, so results depend only on the inputs and
+runs are comparable across machines and days.
+"""
+import asyncio
+
+import httpx
+
+from src.services.geo import AMBULANCE_SPEED_KMH, haversine_km
+
+DETOUR_FACTOR = 1.3
+
+
+class UpstreamStubs:
+    def __init__(self, osrm_latency_ms: float = 20, nominatim_latency_ms: float = 50,
+                 smtp_latency_ms: float = 100):
+        self.osrm_latency_s = osrm_latency_ms / 1000
+        self.nominatim_latency_s = nominatim_latency_ms / 1000
+        self.smtp_latency_s = smtp_latency_ms / 1000
+        self.calls = {"route": 0, "table": 0, "reverse": 0, "smtp": 0}
+
+    @staticmethod
+    def _leg(a, b):
+        """(lng, lat) pairs as OSRM receives them -> metres, seconds"""
+        km = haversine_km(a[1], a[0], b[1], b[0]) * DETOUR_FACTOR
+        return km * 1000, km / AMBULANCE_SPEED_KMH * 3600
+
+    @staticmethod
+    def _coords(path: str):
+        raw = path.rsplit("/", 1)[-1]
+        return [tuple(float(v) for v in pair.split(",")) for pair in raw.split(";")]
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if "/route/" in path:
+            self.calls["route"] += 1
+            await asyncio.sleep(self.osrm_latency_s)
+            start, end = self._coords(path)
+            distance, duration = self._leg(start, end)
+            return httpx.Response(200, json={
+                "code": "Ok",
+                "routes": [{
+                    "distance": distance,
+                    "duration": duration,
+                    "geometry": {"type": "LineString", "coordinates": [list(start), list(end)]},
+                }],
+            })
+        if "/table/" in path:
+            self.calls["table"] += 1
+            await asyncio.sleep(self.osrm_latency_s)
+            origin, *destinations = self._coords(path)
+            legs = [self._leg(origin, d) for d in destinations]
+            return httpx.Response(200, json={
+                "code": "Ok",
+                "distances": [[distance for distance, _ in legs]],
+                "durations": [[duration for _, duration in legs]],
+            })
+        if "/reverse" in path:
+            self.calls["reverse"] += 1
+            await asyncio.sleep(self.nominatim_latency_s)
+            lat, lng = float(request.url.params["lat"]), float(request.url.params["lon"])
+            return httpx.Response(200, json={"display_name": f"Stub Road, {lat:.4f}, {lng:.4f}, Delhi"})
+        return httpx.Response(404)
+
+    async def send_email(self, message, **kwargs):
+        self.calls["smtp"] += 1
+        await asyncio.sleep(self.smtp_latency_s)
+        return {}, "OK"
+
+    def install(self):
+        """Point MapsService and NotificationService at the stand-ins."""
+        from src.services import notification_service
+        from src.services.maps_service import maps_service
+
+        maps_service._create_client = lambda: httpx.AsyncClient(
+            transport=httpx.MockTransport(self.handle)
+        )
+        notification_service.send = self.send_email
@@ -9,7 +9,99 @@ class Settings(BaseSettings):
     
     # OSRM (Maps)
     osrm_server: str = "http://router.project-osrm.org"
+    osrm_max_concurrency: int = 8      # parallel route requests per emergency
+    osrm_route_timeout_s: float = 4.0  # per-route budget before a hospital is skipped
+
+    # Latency-bounded routing: hedge to a secondary OSRM after a delay and fall
+    # back to a haversine/speed-profile estimate (tagged "estimated") at the
+    # deadline instead of dropping the hospital
+    osrm_latency_bounded: bool = True
+    osrm_secondary_server: str = ""    # e.g. a self-hosted OSRM; empty disables hedging
+    osrm_hedge_after_s: float = 1.0
+    estimate_detour_factor: float = 1.3  # road distance / straight-line distance
+
+    # Routing backends tried in order; "local" is the in-process road graph
+    # (needs road_graph_path: a compiled .npz or an edges .csv)
+    routing_backends: str = "osrm,local"
+    road_graph_path: str = ""
+    road_graph_max_snap_km: float = 2.0        # farther from any road node = unroutable
+    routing_breaker_failures: int = 3          # consecutive failed OSRM answers before skipping it
+    routing_breaker_cooldown_s: float = 30.0   # then one probe request decides whether it's back
+
+    # Shared HTTP client (one pool per process, opened in the app lifespan)
+    http_max_connections: int = 50
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_s: float = 30.0
+    http2_enabled: bool = True          # used only when the `h2` package is installed
+    osrm_connect_timeout_s: float = 2.0
+    osrm_read_timeout_s: float = 4.0
+    nominatim_timeout_s: float = 3.0
+
+    # Route cache (origins snapped to a grid / geohash cell; 0 entries disables)
+    route_cache_max_entries: int = 5000
+    route_cache_ttl_s: int = 6 * 3600
+    route_cache_grid_deg: float = 0.002         # ~200 m cells
+    route_cache_geohash_precision: int = 0      # > 0 uses geohash cells instead
+    route_cache_sqlite_path: str = ""           # e.g. "./route_cache.db" to persist
+    route_cache_flush_interval_s: float = 1.0   # write-behind period for the sqlite file
     
+    # Reverse-geocode cache (addresses only feed notifications)
+    geocode_cache_max_entries: int = 10000
+    geocode_cache_ttl_s: int = 24 * 3600
+    geocode_cache_grid_deg: float = 0.0005      # ~50 m cells
+
+    # Hospital lookup (grid spatial index)
+    spatial_index_cell_deg: float = 0.05        # ~5.5 km buckets
+    nearby_hospitals_limit: int = 10            # hospitals returned by /hospitals/{id}
+    hospital_candidate_limit: int = 25          # shortlist the Hospital Agent routes to
+    hospital_registry_refresh_s: float = 30.0   # poll Hospital.last_updated; 0 disables
+
+    # Precomputed ETA grids (python -m src.services.eta_grid); empty dir disables
+    eta_grid_dir: str = ""
+    eta_grid_cell_deg: float = 0.01             # ~1.1 km cells
+
+    # Orchestrator: overall latency budget per emergency, split across stages
+    emergency_deadline_s: float = 8.0
+
+    # Bulk triage (/api/triage/batch)
+    triage_batch_max_patients: int = 1000
+    triage_batch_concurrency: int = 8           # orchestrations in flight per batch, RED first
+
+    # WebSocket fan-out: per-subscriber send queue and slow-consumer handling
+    ws_send_queue_size: int = 64
+    ws_slow_consumer_policy: str = "coalesce"   # "coalesce" drops oldest, "drop" disconnects
+    ws_send_timeout_s: float = 5.0              # a send stalled this long drops the socket
+    ws_max_inflight_requests: int = 8           # concurrent orchestrations per connection
+
+    # Fleet state: in-memory ambulance positions pushed to viewers on change
+    fleet_history_size: int = 256               # recent fixes kept per ambulance
+    fleet_min_move_m: float = 5.0               # smaller moves are GPS jitter, not pushed
+    fleet_simulation_interval_s: float = 1.0    # step for units without GPS; 0 disables
+    fleet_max_tracked_emergencies: int = 10000
+    fleet_sse_keepalive_s: float = 15.0
+    fleet_stale_after_s: float = 300.0          # units silent this long are dropped from the fleet
+
+    # GPS ingestion: pings stay in memory, tracks are persisted down-sampled
+    gps_persist_interval_s: float = 30.0        # 0 disables persistence
+    gps_persist_resolution_s: float = 10.0      # one stored fix per vehicle per window
+    gps_udp_host: str = "0.0.0.0"
+    gps_udp_port: int = 0                       # 0 disables the UDP listener
+
+    # Dispatch: calls arriving within one window are assigned jointly
+    dispatch_batch_window_s: float = 0.5
+    dispatch_candidates_per_request: int = 8    # nearest free units considered per call
+    dispatch_max_radius_km: float = 30.0
+    dispatch_priority_weights: str = "4,2,1"    # ETA multiplier for priority 1 (RED), 2, 3
+    dispatch_unserved_penalty_min: float = 120.0  # cost of leaving a call queued, before weighting
+    dispatch_index_cell_deg: float = 0.02       # ~2 km buckets
+    dispatch_roster: str = ""                   # comma list of dispatchable unit ids; empty = any GPS unit
+
+    # AgentLog audit trail: registry calls are queued and bulk-inserted
+    agent_log_enabled: bool = True
+    agent_log_queue_max: int = 10000            # entries beyond this are dropped
+    agent_log_batch_size: int = 200             # flush early once this many are queued
+    agent_log_flush_interval_s: float = 1.0
+
     # Email Settings (Gmail)
     smtp_server: str = "smtp.gmail.com"
     smtp_port: int = 587
@@ -1,6 +1,18 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from src.api import routes
+from src.services.maps_service import maps_service
+from src.services.hospital_registry import hospital_registry
+from src.services.agent_log_writer import agent_log_writer
+from src.services.eta_grid import eta_grid_store
+from src.services.fleet_state import fleet_state
+from src.services.gps_ingest import gps_ingestor
+from src.services.dispatch import dispatch_engine
+from src.services.metrics import metrics
+from config import get_settings
+from src.database.db import init_db, async_engine
 import uvicorn
 
 # Import websocket only if it exists
@@ -11,10 +23,35 @@ except ImportError:
     HAS_WEBSOCKET = False
     print("⚠️  WebSocket module not found, skipping...")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    # One pooled HTTP client per process for OSRM / Nominatim
+    await maps_service.startup()
+    # Hospital table snapshot + incremental refresher
+    await hospital_registry.start()
+    # Memory-mapped precomputed ETA grids, if built
+    eta_grid_store.load()
+    # Write-behind AgentLog audit trail for registry calls
+    if get_settings().agent_log_enabled:
+        await agent_log_writer.start()
+    # In-memory ambulance positions (simulated until GPS is reported)
+    await fleet_state.start()
+    # Down-sampled GPS track writer (+ UDP listener when a port is set)
+    await gps_ingestor.start()
+    yield
+    await gps_ingestor.stop()
+    await fleet_state.stop()
+    await agent_log_writer.stop()
+    await hospital_registry.stop()
+    await maps_service.shutdown()
+    await async_engine.dispose()
+
 app = FastAPI(
     title="Golden Hour Response System",
     description="AI-powered emergency response backend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS - Allow frontend to connect
@@ -47,14 +84,33 @@ async def health():
         "status": "healthy",
         "endpoints": {
             "triage": "/api/triage",
+            "triage_batch": "/api/triage/batch",
             "hospitals": "/api/hospitals/{emergency_id}",
             "ambulance": "/api/ambulance/{emergency_id}",
+            "ambulance_stream": "/api/ambulance/{emergency_id}/stream",
+            "fleet_gps": "/api/fleet/gps",
             "selected_hospital": "/api/hospitals/{emergency_id}/selected",
             "status": "/api/status/{emergency_id}",
-            "notify": "/api/notify"
-        }
+            "notify": "/api/notify",
+            "metrics": "/metrics"
+        },
+        "caches": {
+            "route": maps_service.route_cache.stats(),
+            "geocode": maps_service.geocode_cache.stats()
+        },
+        "routing": {backend.name: backend.stats() for backend in maps_service.backends},
+        "agent_log": agent_log_writer.stats(),
+        "fleet": fleet_state.stats(),
+        "gps": gps_ingestor.stats(),
+        "dispatch": dispatch_engine.stats(),
+        "websocket": websocket.manager.stats() if HAS_WEBSOCKET else None
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Agent, stage and upstream latency histograms in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     print("🚀 Starting Golden Hour Response System...")
     print("📍 API Docs: http://localhost:8000/docs")
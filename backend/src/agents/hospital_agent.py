@@ -1,6 +1,12 @@
+import heapq
+
 from src.agents.base_agent import BaseAgent
 from src.services.maps_service import maps_service
+from src.services.geo import coords_of, rank_by_distance
 from src.zynd.mock_zynd import zynd_registry
+from config import get_settings
+
+settings = get_settings()
 
 
 class HospitalAgent(BaseAgent):
@@ -12,54 +18,140 @@ class HospitalAgent(BaseAgent):
             name="Hospital Agent"
         )
 
+    @staticmethod
+    def _is_eligible(hospital: dict, severity: str, required_specialists: list) -> bool:
+        if severity == "RED" and hospital.get("icu_beds_available", 0) < 1:
+            return False
+        elif severity == "YELLOW" and hospital.get("emergency_beds_available", 0) < 1:
+            return False
+
+        return all(
+            spec in hospital.get("specialists", [])
+            for spec in required_specialists
+        )
+
+    def _shortlist(
+        self,
+        severity: str,
+        location: tuple,
+        required_specialists: list,
+        hospital_db: list,
+        hospital_index=None,
+    ) -> list:
+        """Nearest eligible hospitals by straight-line distance, nearest first."""
+        def eligible(hospital: dict) -> bool:
+            return self._is_eligible(hospital, severity, required_specialists)
+
+        if hospital_index is not None:
+            # Nearest eligible hospitals from the grid index, no full scan
+            return [
+                hospital
+                for _, hospital in hospital_index.nearest(
+                    location[0],
+                    location[1],
+                    k=settings.hospital_candidate_limit,
+                    predicate=eligible,
+                )
+            ]
+
+        # Straight-line shortlist (vectorized haversine + top-k) before routing
+        candidates, _, _ = rank_by_distance(
+            location,
+            [hospital for hospital in hospital_db if eligible(hospital)],
+            settings.hospital_candidate_limit,
+        )
+        return candidates
+
     async def find_suitable_hospitals(
         self,
         severity: str,
         location: tuple,
         required_specialists: list,
         hospital_db: list,
+        hospital_index=None,
+        route_context=None,
+        eta_grid=None,
     ):
-        suitable_hospitals = []
-
-        for hospital in hospital_db:
-            if severity == "RED" and hospital.get("icu_beds_available", 0) < 1:
-                continue
-            elif severity == "YELLOW" and hospital.get("emergency_beds_available", 0) < 1:
-                continue
-
-            has_specialists = all(
-                spec in hospital.get("specialists", [])
-                for spec in required_specialists
+        candidates = self._shortlist(
+            severity, location, required_specialists, hospital_db, hospital_index
+        )
+        destinations = [coords_of(hospital) for hospital in candidates]
+
+        # Precomputed grid ETAs first (table lookup, no routing)
+        travel = None
+        if eta_grid is not None:
+            travel = eta_grid.legs(location, [hospital["id"] for hospital in candidates])
+        if travel is None:
+            travel = [None] * len(candidates)
+        elif route_context is not None:
+            # Routing agent re-ranks from the same legs; only its final pick is routed live
+            route_context.prime_legs(location, destinations, travel)
+
+        # One OSRM table request covers the rest; unreachable ones drop out
+        missing = [i for i, leg in enumerate(travel) if leg is None]
+        if missing:
+            maps = route_context if route_context is not None else maps_service
+            fetched = await maps.get_travel_matrix(
+                location, [destinations[i] for i in missing]
             )
-            if not has_specialists:
-                continue
+            for i, leg in zip(missing, fetched):
+                travel[i] = leg
 
-            route_info = await maps_service.get_route_details(
-                location, hospital["coords"]
-            )
-            if not route_info:
+        suitable_hospitals = []
+        for hospital, leg in zip(candidates, travel):
+            if not leg:
                 continue
 
             hospital_copy = hospital.copy()
             hospital_copy.update(
                 {
-                    "distance_km": route_info["distance_km"],
-                    "eta_minutes": route_info["duration_min"],
-                    "has_specialists": has_specialists,
+                    "distance_km": leg["distance_km"],
+                    "eta_minutes": leg["duration_min"],
+                    "has_specialists": True,
+                    "estimated": leg.get("estimated", False),
+                    "precomputed": leg.get("precomputed", False),
                 }
             )
 
             suitable_hospitals.append(hospital_copy)
 
-        suitable_hospitals.sort(
+        # Top 5 without sorting every suitable hospital
+        return heapq.nsmallest(
+            5,
+            suitable_hospitals,
             key=lambda x: (
                 x.get("distance_km", 999),
                 -(x.get("icu_beds_available", 0)
                   + x.get("emergency_beds_available", 0)),
-            )
+            ),
         )
 
-        return suitable_hospitals[:5]
+    def estimate_suitable_hospitals(self, payload: dict) -> list:
+        """
+        Fallback when routing is late: top 5 by straight-line distance with
+        speed-profile ETAs, tagged as estimated.
+        """
+        candidates, distances, etas = rank_by_distance(
+            payload["location"],
+            self._shortlist(
+                payload["severity"],
+                payload["location"],
+                payload["required_specialists"],
+                payload["hospital_db"],
+                payload.get("hospital_index"),
+            ),
+            5,
+        )
+        return [
+            {
+                **hospital,
+                "distance_km": round(float(distance), 2),
+                "eta_minutes": float(eta),
+                "has_specialists": True,
+                "estimated": True,
+            }
+            for hospital, distance, eta in zip(candidates, distances, etas)
+        ]
 
     async def execute(self, payload: dict) -> list:
         return await self.find_suitable_hospitals(
@@ -67,6 +159,9 @@ class HospitalAgent(BaseAgent):
             location=payload["location"],
             required_specialists=payload["required_specialists"],
             hospital_db=payload["hospital_db"],
+            hospital_index=payload.get("hospital_index"),
+            route_context=payload.get("route_context"),
+            eta_grid=payload.get("eta_grid"),
         )
 
 
@@ -76,4 +171,4 @@ hospital_agent = HospitalAgent()
 async def _hospital_handler(payload: dict):
     return await hospital_agent.execute(payload)
 
-zynd_registry.register_agent(hospital_agent.did, _hospital_handler)
+zynd_registry.register_agent(hospital_agent.did, _hospital_handler, name=hospital_agent.name)
@@ -38,4 +38,4 @@ async def _notification_handler(payload: dict):
         payload["emergency_data"], payload["hospital_data"]
     )
 
-zynd_registry.register_agent(notification_agent.did, _notification_handler)
+zynd_registry.register_agent(notification_agent.did, _notification_handler, name=notification_agent.name)
@@ -1,4 +1,5 @@
 from src.services.maps_service import maps_service
+from src.services.geo import coords_of, rank_by_distance
 from src.zynd.mock_zynd import zynd_registry
 
 
@@ -6,29 +7,65 @@ class RoutingAgent:
     did = "did:zynd:agent_routing_def456"
     name = "Routing Agent"
 
-    async def find_best_hospital(self, emergency_location: tuple, hospitals: list):
-        evaluated_hospitals = []
+    async def find_best_hospital(
+        self, emergency_location: tuple, hospitals: list, route_context=None
+    ):
+        # A per-emergency RouteContext reuses legs the Hospital Agent already fetched
+        maps = route_context if route_context is not None else maps_service
+        travel = await maps.get_travel_matrix(
+            emergency_location, [coords_of(hospital) for hospital in hospitals]
+        )
 
-        for hospital in hospitals:
-            route_info = await maps_service.get_route_details(
-                emergency_location, hospital["coords"]
-            )
+        ranked = sorted(
+            (
+                (leg, hospital)
+                for hospital, leg in zip(hospitals, travel)
+                if leg
+            ),
+            key=lambda x: x[0]["duration_min"],
+        )
 
+        if not ranked:
+            return None
+
+        # Full geometry only for the winner (next best if its route fails)
+        for leg, hospital in ranked:
+            route_info = await maps.get_route_details(
+                emergency_location, coords_of(hospital)
+            )
             if route_info:
-                hospital_data = hospital.copy()
-                hospital_data["route_info"] = route_info
-                evaluated_hospitals.append(hospital_data)
+                break
+        else:
+            leg, hospital = ranked[0]
+            route_info = {**leg, "geometry": None}
 
-        evaluated_hospitals.sort(key=lambda x: x["route_info"]["duration_min"])
+        hospital_data = hospital.copy()
+        hospital_data["route_info"] = route_info
+        return hospital_data
 
-        if not evaluated_hospitals:
+    def estimate_best_hospital(self, emergency_location: tuple, hospitals: list):
+        """
+        Fallback when routing overruns: nearest hospital by haversine with a
+        speed-profile ETA, tagged as estimated.
+        """
+        nearest, distances, etas = rank_by_distance(emergency_location, hospitals, 1)
+        if not nearest:
             return None
 
-        return evaluated_hospitals[0]
+        hospital_data = nearest[0].copy()
+        hospital_data["route_info"] = {
+            "distance_km": round(float(distances[0]), 2),
+            "duration_min": float(etas[0]),
+            "geometry": None,
+            "estimated": True,
+        }
+        return hospital_data
 
     async def execute(self, payload: dict):
         return await self.find_best_hospital(
-            payload["emergency_location"], payload["hospitals"]
+            payload["emergency_location"],
+            payload["hospitals"],
+            route_context=payload.get("route_context"),
         )
 
 
@@ -37,4 +74,4 @@ routing_agent = RoutingAgent()
 async def _routing_handler(payload: dict):
     return await routing_agent.execute(payload)
 
-zynd_registry.register_agent(routing_agent.did, _routing_handler)
+zynd_registry.register_agent(routing_agent.did, _routing_handler, name=routing_agent.name)
@@ -1,8 +1,60 @@
+import re
+from typing import List
+
+import numpy as np
+
 from src.agents.base_agent import BaseAgent
-from src.models.schemas import TriageInput
 from src.zynd.mock_zynd import zynd_registry
 
 
+def parse_age(age) -> int:
+    """Age as int from 50, "50", "40-45" (lower bound) or "60+"; 0 if unknown."""
+    if isinstance(age, (int, float)):
+        return int(age)
+    match = re.search(r"\d+", str(age or ""))
+    return int(match.group()) if match else 0
+
+
+def symptom_text(symptoms) -> str:
+    """
+    Symptoms from the frontend form (one free-text string) or the legacy
+    API (list of ids) as one lowercase snake_case string, so "Chest pain"
+    and "chest_pain" match the same keyword.
+    """
+    if not isinstance(symptoms, str):
+        symptoms = " ".join(str(s) for s in symptoms or [])
+    return re.sub(r"[\s-]+", "_", symptoms.strip().lower())
+
+
+# (symptom keywords, minimum age, outcome); the first matching rule wins
+TRIAGE_RULES = [
+    (("chest_pain",), 60, {
+        "severity": "RED",
+        "priority": 1,
+        "estimated_risk": "CRITICAL - Possible cardiac event",
+        "recommended_specialists": ["cardiologist", "emergency_physician"],
+    }),
+    (("severe_bleeding", "fracture"), 0, {
+        "severity": "RED",
+        "priority": 1,
+        "estimated_risk": "CRITICAL - Trauma",
+        "recommended_specialists": ["trauma_surgeon"],
+    }),
+    (("fever", "moderate_pain"), 0, {
+        "severity": "YELLOW",
+        "priority": 2,
+        "estimated_risk": "Urgent but stable",
+        "recommended_specialists": ["general_physician"],
+    }),
+]
+ROUTINE = {
+    "severity": "GREEN",
+    "priority": 3,
+    "estimated_risk": "Routine issue",
+    "recommended_specialists": ["general_physician"],
+}
+
+
 class TriageAgent(BaseAgent):
     def __init__(self):
         super().__init__(
@@ -11,42 +63,37 @@ class TriageAgent(BaseAgent):
         )
 
     def execute(self, payload: dict) -> dict:
-        data = TriageInput(**payload)
-
-        symptoms = data.symptoms
-        vitals = data.vitals
-        age = data.age
-
-        severity = "GREEN"
-        priority = 3
-        risk = "Routine issue"
-        specialists = ["general_physician"]
-
-        if "chest_pain" in symptoms and age >= 60:
-            severity = "RED"
-            priority = 1
-            risk = "CRITICAL - Possible cardiac event"
-            specialists = ["cardiologist", "emergency_physician"]
-
-        elif "severe_bleeding" in symptoms or "fracture" in symptoms:
-            severity = "RED"
-            priority = 1
-            risk = "CRITICAL - Trauma"
-            specialists = ["trauma_surgeon"]
-
-        elif "fever" in symptoms or "moderate_pain" in symptoms:
-            severity = "YELLOW"
-            priority = 2
-            risk = "Urgent but stable"
-            specialists = ["general_physician"]
-
-        return {
-            **self._meta(),
-            "severity": severity,
-            "priority": priority,
-            "estimated_risk": risk,
-            "recommended_specialists": specialists,
-        }
+        # Frontend (TriageInput) and legacy (EmergencyRequest) payloads both land here
+        symptoms = symptom_text(payload.get("symptoms"))
+        age = parse_age(payload.get("age"))
+
+        for keywords, min_age, outcome in TRIAGE_RULES:
+            if age >= min_age and any(keyword in symptoms for keyword in keywords):
+                return {**self._meta(), **outcome}
+        return {**self._meta(), **ROUTINE}
+
+    def classify_batch(self, payloads: List[dict]) -> List[dict]:
+        """
+        Same rules as execute() for many patients at once: every keyword is
+        matched across all symptom texts in one numpy pass, and np.select
+        picks the first matching rule per patient.
+        """
+        if not payloads:
+            return []
+        texts = np.array([symptom_text(p.get("symptoms")) for p in payloads])
+        ages = np.array([parse_age(p.get("age")) for p in payloads])
+
+        conditions = []
+        for keywords, min_age, _ in TRIAGE_RULES:
+            hit = np.zeros(len(payloads), dtype=bool)
+            for keyword in keywords:
+                hit |= np.char.find(texts, keyword) >= 0
+            conditions.append(hit & (ages >= min_age))
+        rule = np.select(conditions, np.arange(len(TRIAGE_RULES)), default=len(TRIAGE_RULES))
+
+        meta = self._meta()
+        outcomes = [outcome for _, _, outcome in TRIAGE_RULES] + [ROUTINE]
+        return [{**meta, **outcomes[i]} for i in rule.tolist()]
 
     def classify_emergency(self, payload: dict) -> dict:
         return self.execute(payload)
@@ -55,4 +102,4 @@ class TriageAgent(BaseAgent):
 triage_agent = TriageAgent()
 
 # 🔗 Register with mock Zynd registry
-zynd_registry.register_agent(triage_agent.did, triage_agent.execute)
+zynd_registry.register_agent(triage_agent.did, triage_agent.execute, name=triage_agent.name)
@@ -1,19 +1,34 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import base64
+import json
 import math
-import random
+import numpy as np
 
 
 # Import schemas and orchestrator
-from src.models.schemas import TriageInput, EmergencyRequest, LocationData
+from src.models.schemas import TriageInput, TriageBatch, EmergencyRequest, LocationData, GpsBatch
 from src.orchestrator.orchestrator import orchestrator
-from src.database.db import get_db, Emergency
+from src.orchestrator.event_handler import orchestrator as event_orchestrator
+from src.agents.triage_agent import triage_agent
+from src.database.db import get_async_db, Emergency
+from src.services.hospital_registry import hospital_registry
+from src.services.geo import eta_minutes_batch
+from src.services.eta_grid import eta_grid_store
+from src.services.fleet_state import fleet_state
+from src.services.gps_ingest import gps_ingestor
+from src.services.dispatch import dispatch_engine
+from config import get_settings
 
 
 router = APIRouter()
+settings = get_settings()
 
 
 
@@ -59,11 +74,33 @@ def calculate_eta(distance_km: float) -> int:
 # =====================
 
 
+def orchestrator_payload(request: TriageInput) -> dict:
+    """Event-flow payload for one patient, with the hospital shortlist attached"""
+    lat = request.location.lat if request.location else None
+    lng = request.location.lng if request.location else None
+    candidates = []
+    if lat is not None and lng is not None:
+        candidates = [
+            {"id": h["id"], "name": h["name"], "coords": h["coords"]}
+            for _, h in hospital_registry.nearest(lat, lng, k=settings.hospital_candidate_limit)
+        ]
+    return {
+        "patientName": request.patientName,
+        "age": request.age,
+        "gender": request.gender,
+        "contact": request.contact,
+        "symptoms": request.symptoms,
+        "vitals": request.vitals.dict(),
+        "location": {"lat": lat, "lng": lng},
+        "candidate_hospitals": candidates,
+    }
+
+
 @router.post("/triage")
 async def triage_emergency(
     request: TriageInput,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Receives emergency from new frontend form.
@@ -90,26 +127,19 @@ async def triage_emergency(
             status="REGISTERED"
         )
         
+        # id is assigned at flush; objects don't expire on commit, so no refresh
         db.add(emergency)
-        db.commit()
-        db.refresh(emergency)
+        await db.commit()
         
         print(f"✅ Emergency saved with ID: {emergency.id}")
         
         # Prepare payload for orchestrator
-        payload = {
-            "patientName": request.patientName,
-            "age": request.age,
-            "gender": request.gender,
-            "contact": request.contact,
-            "symptoms": request.symptoms,
-            "vitals": request.vitals.dict(),
-            "location": {"lat": request.location.lat, "lng": request.location.lng}
-        }
+        payload = orchestrator_payload(request)
         
-        # Trigger orchestrator in background - FIXED: pass as positional args
+        # Event-driven flow takes (emergency_id, payload); the request-based
+        # orchestrator behind /emergency/create does not
         background_tasks.add_task(
-            orchestrator.handle_emergency,
+            event_orchestrator.handle_emergency,
             emergency.id,  # First positional argument
             payload        # Second positional argument
         )
@@ -126,9 +156,106 @@ async def triage_emergency(
         print(f"❌ Error in /triage: {str(e)}")
         import traceback
         traceback.print_exc()
-        db.rollback()
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+@router.post("/triage/batch")
+async def triage_batch(
+    batch: TriageBatch,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Mass-casualty intake: many patients in one request.
+    Triage runs once over the whole list, all Emergency rows go in with one
+    multi-row INSERT in a single transaction, located patients are queued
+    for dispatch together (one joint assignment), and orchestration is
+    scheduled highest priority first, reusing those triage results and
+    dispatch requests rather than repeating them per patient. Patients without a location are
+    still registered, but each entry's `dispatch` says whether it was
+    queued or left "unlocated" for a dispatcher to handle.
+    """
+    patients = batch.patients
+    if len(patients) > settings.triage_batch_max_patients:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.triage_batch_max_patients} patients per batch"
+        )
+    print(f"🚨 Received casualty list: {len(patients)} patients")
+
+    payloads = [orchestrator_payload(patient) for patient in patients]
+    results = triage_agent.classify_batch(payloads)
+
+    located = [
+        payload["location"]["lat"] is not None and payload["location"]["lng"] is not None
+        for payload in payloads
+    ]
+    rows = [
+        {
+            "location": (
+                f"Lat: {payload['location']['lat']}, Lng: {payload['location']['lng']}"
+                if has_location else None
+            ),
+            "latitude": payload["location"]["lat"],
+            "longitude": payload["location"]["lng"],
+            "symptoms": [patient.symptoms],
+            "age_group": patient.age,
+            "vitals": payload["vitals"],
+            "severity": result["severity"],
+            "priority": result["priority"],
+            "status": "REGISTERED",
+        }
+        for patient, payload, result, has_location in zip(patients, payloads, results, located)
+    ]
+
+    try:
+        inserted = await db.execute(
+            insert(Emergency).returning(Emergency.id, sort_by_parameter_order=True), rows
+        )
+        emergency_ids = inserted.scalars().all()
+        await db.commit()
+    except Exception as e:
+        print(f"❌ Error in /triage/batch: {e!r}")
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+    print(f"✅ Saved {len(emergency_ids)} emergencies (IDs {emergency_ids[0]}-{emergency_ids[-1]})")
+
+    # Queued here, all at once, so they share one joint assignment; each
+    # flow's dispatch stage then awaits its future instead of queueing again
+    assignments = [
+        dispatch_engine.request(
+            emergency_id, payload["location"]["lat"], payload["location"]["lng"], result["priority"]
+        ) if has_location else None
+        for emergency_id, payload, result, has_location in zip(emergency_ids, payloads, results, located)
+    ]
+    unlocated = located.count(False)
+    if unlocated:
+        print(f"⚠️  {unlocated} patients have no location and were not queued for dispatch")
+
+    background_tasks.add_task(
+        event_orchestrator.handle_batch,
+        list(zip(emergency_ids, payloads, results, assignments)),
+        settings.triage_batch_concurrency,
+    )
+
+    return {
+        "success": True,
+        "count": len(emergency_ids),
+        "status": "PROCESSING",
+        "unlocated": unlocated,
+        "emergencies": [
+            {
+                "emergencyId": emergency_id,
+                "severity": result["severity"],
+                "priority": result["priority"],
+                "dispatch": "queued" if has_location else "unlocated",
+            }
+            for emergency_id, result, has_location in zip(emergency_ids, results, located)
+        ],
+    }
 
 
 # =====================
@@ -139,7 +266,7 @@ async def triage_emergency(
 @router.get("/hospitals/{emergency_id}")
 async def get_hospital_for_emergency(
     emergency_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get assigned hospital for an emergency with calculated distances
@@ -148,7 +275,7 @@ async def get_hospital_for_emergency(
         print(f"🏥 Fetching hospitals for Emergency ID: {emergency_id}")
         
         # Fetch emergency from database
-        emergency = db.query(Emergency).filter(Emergency.id == emergency_id).first()
+        emergency = await db.get(Emergency, emergency_id)
         
         if not emergency:
             raise HTTPException(status_code=404, detail="Emergency not found")
@@ -159,118 +286,38 @@ async def get_hospital_for_emergency(
         
         print(f"📍 User location: ({user_lat}, {user_lng})")
         
-        # Update emergency status if still registered
+        # Status and assignment are written together in one commit below
         if emergency.status == "REGISTERED":
             emergency.status = "ASSIGNED"
             emergency.severity = "HIGH"
-            db.commit()
-            db.refresh(emergency)
-            print(f"✅ Updated emergency status to ASSIGNED")
         
-        # Hospital coordinates (actual locations in Delhi/NCR)
-        hospitals_data = [
-            {
-                "id": 1,
-                "name": "All India Institute of Medical Sciences (AIIMS)",
-                "address": "Ansari Nagar, New Delhi - 110029",
-                "lat": 28.5672,
-                "lng": 77.2100,
-                "phone": "+91-11-2658-8500",
-                "specialties": ["Emergency Medicine", "Cardiology", "Trauma", "ICU"],
-                "bedsAvailable": 15
-            },
-            {
-                "id": 2,
-                "name": "Fortis Hospital",
-                "address": "Sector 62, Noida, Uttar Pradesh",
-                "lat": 28.6066,
-                "lng": 77.3572,
-                "phone": "+91-120-500-3333",
-                "specialties": ["Emergency Medicine", "Neurology", "Orthopedics"],
-                "bedsAvailable": 10
-            },
-            {
-                "id": 3,
-                "name": "Max Super Specialty Hospital",
-                "address": "Saket, New Delhi - 110017",
-                "lat": 28.5244,
-                "lng": 77.2066,
-                "phone": "+91-11-2651-5050",
-                "specialties": ["Emergency Medicine", "General Surgery", "ICU"],
-                "bedsAvailable": 8
-            },
-            {
-                "id": 4,
-                "name": "Apollo Hospital",
-                "address": "Mathura Road, Sarita Vihar, Delhi",
-                "lat": 28.5355,
-                "lng": 77.2952,
-                "phone": "+91-11-2692-5858",
-                "specialties": ["Emergency Medicine", "Cardiology", "Pulmonology"],
-                "bedsAvailable": 6
-            },
-            {
-                "id": 5,
-                "name": "Safdarjung Hospital",
-                "address": "Ring Road, New Delhi - 110029",
-                "lat": 28.5678,
-                "lng": 77.2065,
-                "phone": "+91-11-2673-0000",
-                "specialties": ["Emergency Medicine", "Trauma", "General Medicine"],
-                "bedsAvailable": 12
-            },
-            {
-                "id": 6,
-                "name": "Fortis Hospital Shalimar Bagh",
-                "address": "A Block, Shalimar Bagh, Delhi - 110088",
-                "lat": 28.7194,
-                "lng": 77.1642,
-                "phone": "+91-11-4714-4444",
-                "specialties": ["Emergency Medicine", "Cardiology", "Orthopedics"],
-                "bedsAvailable": 9
-            },
-            {
-                "id": 7,
-                "name": "Batra Hospital",
-                "address": "Tughlakabad, New Delhi - 110062",
-                "lat": 28.5005,
-                "lng": 77.2806,
-                "phone": "+91-11-2995-5555",
-                "specialties": ["Emergency Medicine", "Cardiology", "Neurology"],
-                "bedsAvailable": 7
-            },
-            {
-                "id": 8,
-                "name": "Max Hospital Pitampura",
-                "address": "Pitampura, Delhi - 110034",
-                "lat": 28.6952,
-                "lng": 77.1312,
-                "phone": "+91-11-4040-4040",
-                "specialties": ["Emergency Medicine", "Neurology", "Orthopedics"],
-                "bedsAvailable": 11
-            }
-        ]
+        # Nearest hospitals from the index, ETAs computed in one vectorized pass
+        nearby = hospital_registry.nearest(user_lat, user_lng, k=settings.nearby_hospitals_limit)
+        distances = np.round([distance_km for distance_km, _ in nearby], 1)
+        etas = eta_minutes_batch(distances)
+        # Road ETAs from the precomputed grid where the location is covered
+        grid_legs = eta_grid_store.legs(
+            (user_lat, user_lng), [hospital["id"] for _, hospital in nearby]
+        ) or [None] * len(nearby)
         
-        # Calculate distance and ETA for each hospital
         hospitals_with_distance = []
-        for hospital in hospitals_data:
-            distance = calculate_distance(user_lat, user_lng, hospital["lat"], hospital["lng"])
-            eta = calculate_eta(distance)
-            
+        for (_, hospital), distance, eta, leg in zip(nearby, distances, etas, grid_legs):
             hospitals_with_distance.append({
                 "id": hospital["id"],
                 "name": hospital["name"],
                 "address": hospital["address"],
-                "distance": distance,
-                "eta": eta,
+                "distance": round(leg["distance_km"], 1) if leg else float(distance),
+                "eta": int(leg["duration_min"]) if leg else int(eta),
+                "etaSource": "grid" if leg else "estimate",
                 "bedsAvailable": hospital["bedsAvailable"],
                 "phone": hospital["phone"],
                 "specialties": hospital["specialties"],
                 "isRecommended": False  # Will be set for nearest hospital
             })
         
-        # Sort by distance (nearest first)
-        hospitals_with_distance.sort(key=lambda x: x["distance"])
+        # Index returns nearest first; with grid ETAs, fastest first
+        if any(grid_legs):
+            hospitals_with_distance.sort(key=lambda h: h["eta"])
         
         # Mark nearest hospital as recommended
         if hospitals_with_distance:
@@ -279,7 +326,10 @@ async def get_hospital_for_emergency(
             # Update emergency with nearest hospital info
             emergency.assigned_hospital_id = hospitals_with_distance[0]["id"]
             emergency.estimated_arrival_time = f"{hospitals_with_distance[0]['eta']} minutes"
-            db.commit()
+        
+        if db.dirty:
+            await db.commit()
+            print(f"✅ Emergency {emergency_id} status: {emergency.status}")
         
         print(f"✅ Returning {len(hospitals_with_distance)} hospitals sorted by distance")
         print(f"   Nearest: {hospitals_with_distance[0]['name']} ({hospitals_with_distance[0]['distance']} km, {hospitals_with_distance[0]['eta']} min)")
@@ -307,72 +357,89 @@ async def get_hospital_for_emergency(
 
 
 @router.get("/ambulance/{emergency_id}")
-async def get_ambulance_location(
-    emergency_id: int,
-    db: Session = Depends(get_db)
-):
+async def get_ambulance_location(emergency_id: int):
     """
     Get current ambulance location for an emergency.
-    Simulates real-time ambulance tracking.
+    Served from the in-memory fleet state; the database is only read the
+    first time an emergency is tracked.
     """
     try:
-        print(f"🚑 Fetching ambulance location for Emergency ID: {emergency_id}")
-        
-        # Fetch emergency from database
-        emergency = db.query(Emergency).filter(Emergency.id == emergency_id).first()
-        
-        if not emergency:
-            raise HTTPException(status_code=404, detail="Emergency not found")
-        
-        user_lat = emergency.latitude
-        user_lng = emergency.longitude
-        
-        # Simulate ambulance starting position (nearby but not at emergency location)
-        # In production, this would come from actual GPS tracking
-        ambulance_lat = user_lat + random.uniform(-0.02, 0.02)  # ~2km radius
-        ambulance_lng = user_lng + random.uniform(-0.02, 0.02)
-        
-        # Calculate distance from ambulance to emergency
-        distance_to_emergency = calculate_distance(ambulance_lat, ambulance_lng, user_lat, user_lng)
-        eta_minutes = calculate_eta(distance_to_emergency)
-        
-        # Determine status based on distance
-        if distance_to_emergency < 0.5:
-            status = "arriving"
-        elif distance_to_emergency < 2:
-            status = "nearby"
-        else:
-            status = "en_route"
-        
-        print(f"✅ Ambulance at ({ambulance_lat}, {ambulance_lng})")
-        print(f"   Distance to emergency: {distance_to_emergency} km, ETA: {eta_minutes} min")
-        
-        return {
-            "emergencyId": emergency_id,
-            "ambulanceId": f"AMB-{emergency_id:04d}",
-            "currentLat": round(ambulance_lat, 6),
-            "currentLng": round(ambulance_lng, 6),
-            "status": status,
-            "distanceToEmergency": distance_to_emergency,
-            "eta": f"{eta_minutes} minutes",
-            "driverName": "Ramesh Kumar",
-            "vehicleNumber": f"DL-{random.randint(1,9)}C-{random.randint(1000,9999)}",
-            "lastUpdated": datetime.utcnow().isoformat()
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"❌ Error fetching ambulance location: {e}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+        tracked = await fleet_state.ensure_tracked(emergency_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if tracked is None:
+        raise HTTPException(status_code=404, detail="Emergency not found")
+    return fleet_state.view(emergency_id)
+
+
+@router.get("/ambulance/{emergency_id}/stream")
+async def stream_ambulance_location(emergency_id: int, request: Request):
+    """
+    Server-sent events: the current ambulance location, then one event per
+    visible position change (no polling, nothing sent while it stands still).
+    """
+    try:
+        tracked = await fleet_state.ensure_tracked(emergency_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if tracked is None:
+        raise HTTPException(status_code=404, detail="Emergency not found")
+
+    async def events():
+        queue = fleet_state.subscribe(emergency_id)
+        try:
+            yield f"data: {json.dumps(fleet_state.view(emergency_id))}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.fleet_sse_keepalive_s)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(message)}\n\n"
+        finally:
+            fleet_state.unsubscribe(emergency_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/fleet/gps")
+async def ingest_gps(batch: GpsBatch):
+    """
+    Batch GPS ingestion: columnar pings for any number of ambulances.
+    Pings are kept in memory (latest position + recent history); tracks
+    are persisted down-sampled in the background, never row per ping.
+    """
+    try:
+        # All tracks are validated before any is applied: a 422 ingests nothing
+        results = gps_ingestor.ingest_batch({
+            ambulance_id: (track.timestamps, track.lats, track.lngs, track.speeds)
+            for ambulance_id, track in batch.vehicles.items()
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {
+        "accepted": sum(r["accepted"] for r in results.values()),
+        "rejected": sum(r["rejected"] for r in results.values()),
+        "vehicles": len(results),
+    }
+
+
+@router.post("/fleet/{ambulance_id}/release")
+async def release_ambulance(ambulance_id: str):
+    """Return a unit to service after its job; queued calls are re-dispatched."""
+    if not dispatch_engine.release(ambulance_id):
+        raise HTTPException(status_code=404, detail="Ambulance is not on a job")
+    return {"ambulanceId": ambulance_id, "status": "available"}
 
 
 @router.get("/hospitals/{emergency_id}/selected")
 async def get_selected_hospital(
     emergency_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get the selected/nearest hospital for an emergency.
@@ -382,7 +449,7 @@ async def get_selected_hospital(
         print(f"🏥 Fetching selected hospital for Emergency ID: {emergency_id}")
         
         # Fetch emergency from database
-        emergency = db.query(Emergency).filter(Emergency.id == emergency_id).first()
+        emergency = await db.get(Emergency, emergency_id)
         
         if not emergency:
             raise HTTPException(status_code=404, detail="Emergency not found")
@@ -390,61 +457,21 @@ async def get_selected_hospital(
         user_lat = emergency.latitude
         user_lng = emergency.longitude
         
-        # Get nearest hospital (reuse hospital data from get_hospital_for_emergency)
-        hospitals_data = [
-            {
-                "id": 1,
-                "name": "AIIMS Delhi",
-                "address": "Ansari Nagar, New Delhi - 110029",
-                "lat": 28.5672,
-                "lng": 77.2100,
-                "phone": "+91-11-2658-8500"
-            },
-            {
-                "id": 2,
-                "name": "Fortis Hospital Noida",
-                "address": "Sector 62, Noida",
-                "lat": 28.6066,
-                "lng": 77.3572,
-                "phone": "+91-120-500-3333"
-            },
-            {
-                "id": 3,
-                "name": "Max Hospital Saket",
-                "address": "Saket, New Delhi",
-                "lat": 28.5244,
-                "lng": 77.2066,
-                "phone": "+91-11-2651-5050"
-            },
-            {
-                "id": 4,
-                "name": "Apollo Hospital Delhi",
-                "address": "Sarita Vihar, Delhi",
-                "lat": 28.5355,
-                "lng": 77.2952,
-                "phone": "+91-11-2692-5858"
-            }
-        ]
-        
-        # Calculate distances and find nearest
-        nearest_hospital = None
-        min_distance = float('inf')
-        
-        for hospital in hospitals_data:
-            distance = calculate_distance(user_lat, user_lng, hospital["lat"], hospital["lng"])
-            if distance < min_distance:
-                min_distance = distance
-                nearest_hospital = hospital
+        # Find nearest via the hospital registry's spatial index
+        nearest = hospital_registry.nearest(user_lat, user_lng, k=1)
         
-        if not nearest_hospital:
+        if not nearest:
             raise HTTPException(status_code=404, detail="No hospitals found")
         
+        min_distance, nearest_hospital = nearest[0]
+        min_distance = round(min_distance, 1)
+        
         eta_minutes = calculate_eta(min_distance)
         
         # Update emergency record with selected hospital
         emergency.assigned_hospital_id = nearest_hospital["id"]
         emergency.estimated_arrival_time = f"{eta_minutes} minutes"
-        db.commit()
+        await db.commit()
         
         print(f"✅ Selected Hospital: {nearest_hospital['name']}")
         print(f"   Distance: {min_distance} km, ETA: {eta_minutes} min")
@@ -459,7 +486,7 @@ async def get_selected_hospital(
             "phone": nearest_hospital["phone"],
             "distance": round(min_distance, 1),
             "eta": f"{eta_minutes} minutes",
-            "bedsAvailable": random.randint(5, 15),
+            "bedsAvailable": nearest_hospital["bedsAvailable"],
             "isSelected": True
         }
         
@@ -473,33 +500,107 @@ async def get_selected_hospital(
 
 
 
+# =====================
+# Emergency Listing (Dispatch Dashboard)
+# =====================
+
+
+def encode_cursor(emergency: Emergency) -> str:
+    """Opaque keyset cursor: position of the last row on a page"""
+    raw = f"{emergency.created_at.isoformat()}|{emergency.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, emergency_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(emergency_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/emergencies")
+async def list_emergencies(
+    status: Optional[List[str]] = Query(None),
+    severity: Optional[List[str]] = Query(None),
+    hospital_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List emergencies newest first, filtered by status, severity, time range
+    and assigned hospital. Pages with a keyset cursor on (created_at, id):
+    pass `next_cursor` from the previous page to continue, so deep pages
+    cost the same as the first one (no OFFSET scan).
+    """
+    query = select(Emergency)
+    if status:
+        query = query.where(Emergency.status.in_(status))
+    if severity:
+        query = query.where(Emergency.severity.in_(severity))
+    if hospital_id:
+        query = query.where(Emergency.assigned_hospital_id == hospital_id)
+    if since:
+        query = query.where(Emergency.created_at >= since)
+    if until:
+        query = query.where(Emergency.created_at < until)
+    if cursor:
+        query = query.where(
+            tuple_(Emergency.created_at, Emergency.id) < tuple_(*decode_cursor(cursor))
+        )
+
+    # One extra row tells us whether another page exists
+    query = query.order_by(Emergency.created_at.desc(), Emergency.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).scalars().all()
+    page = rows[:limit]
+
+    return {
+        "emergencies": [
+            {
+                "emergencyId": e.id,
+                "status": e.status,
+                "severity": e.severity,
+                "priority": e.priority,
+                "location": {"lat": e.latitude, "lng": e.longitude},
+                "assignedHospital": e.assigned_hospital_id,
+                "assignedAmbulance": e.assigned_ambulance_id,
+                "eta": e.estimated_arrival_time,
+                "createdAt": e.created_at.isoformat(),
+            }
+            for e in page
+        ],
+        "count": len(page),
+        "next_cursor": encode_cursor(page[-1]) if len(rows) > limit else None,
+    }
+
+
+
 # =====================
 # Supporting Endpoints
 # =====================
 
 
 @router.get("/status/{emergency_id}")
-async def get_agent_status(emergency_id: int, db: Session = Depends(get_db)):
+async def get_agent_status(emergency_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get emergency processing status"""
     print(f"📊 Status check for Emergency ID: {emergency_id}")
     
-    emergency = db.query(Emergency).filter(Emergency.id == emergency_id).first()
+    emergency = await db.get(Emergency, emergency_id)
     
     if not emergency:
         raise HTTPException(status_code=404, detail="Emergency not found")
     
-    # Auto-update status if still registered (simulate processing)
-    if emergency.status == "REGISTERED":
-        emergency.status = "PROCESSING"
-        emergency.severity = "HIGH"
-        db.commit()
-        db.refresh(emergency)
-        print(f"✅ Updated status to PROCESSING")
+    # Read-only: a registered emergency is reported as being processed
+    # without writing that back (polling clients must not take the write lock)
+    processing = emergency.status == "REGISTERED"
     
     return {
         "emergencyId": emergency.id,
-        "status": emergency.status,
-        "severity": emergency.severity,
+        "status": "PROCESSING" if processing else emergency.status,
+        "severity": "HIGH" if processing else emergency.severity,
         "assignedHospital": emergency.assigned_hospital_id,
         "eta": emergency.estimated_arrival_time,
         "timestamp": emergency.created_at.isoformat() if emergency.created_at else None
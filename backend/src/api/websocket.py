@@ -1,70 +1,299 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from typing import Dict
 from src.orchestrator.orchestrator import orchestrator
+from src.services.fleet_state import fleet_state
+from config import get_settings
+import asyncio
 import json
+import uuid
 
 router = APIRouter()
+settings = get_settings()
+
+
+class Subscriber:
+    """
+    One socket on one topic. Messages go through a bounded queue drained
+    by the subscriber's own sender task, so a slow socket only delays
+    itself. When the queue is full, the oldest pending message is dropped
+    ("coalesce": viewers care about the latest state) or the subscriber is
+    disconnected ("drop").
+    """
+
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager", topic: str):
+        self.websocket = websocket
+        self.manager = manager
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ws_send_queue_size)
+        self.coalesced = 0
+        self.sender = asyncio.create_task(self._send_forever())
+
+    def offer(self, text: str) -> bool:
+        """Queue an already-serialized message; False if the subscriber was dropped."""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if settings.ws_slow_consumer_policy == "coalesce":
+            self.queue.get_nowait()
+            self.queue.put_nowait(text)
+            self.coalesced += 1
+            self.manager.coalesced += 1
+            return True
+        self.manager.drop(self, reason="send queue full")
+        return False
+
+    async def _send_forever(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                await asyncio.wait_for(
+                    self.websocket.send_text(text), timeout=settings.ws_send_timeout_s
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Stalled or closed socket: stop sending to it
+            self.manager.drop(self, reason=repr(e))
+
 
 class ConnectionManager:
-    """Manages active WebSocket connections"""
+    """
+    WebSocket pub/sub grouped by topic (emergency id).
+
+    Broadcasts serialize the message once and hand the same text to every
+    subscriber's queue without awaiting any socket, so fan-out is concurrent
+    and one slow viewer never stalls the others. Subscribe / unsubscribe
+    are dict operations.
+    """
+
     def __init__(self):
-        self.active_connections: list[WebSocket] = []
+        self.topics: Dict[str, Dict[WebSocket, Subscriber]] = {}
+        self.coalesced = 0
+        self.dropped = 0
+        self._closing = set()  # close tasks for dropped sockets, referenced until done
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, topic: str) -> Subscriber:
         await websocket.accept()
-        self.active_connections.append(websocket)
+        subscriber = Subscriber(websocket, self, topic)
+        self.topics.setdefault(topic, {})[websocket] = subscriber
+        return subscriber
+
+    def disconnect(self, websocket: WebSocket, topic: str):
+        subscribers = self.topics.get(topic)
+        if not subscribers:
+            return
+        subscriber = subscribers.pop(websocket, None)
+        if not subscribers:
+            del self.topics[topic]
+        if subscriber is not None and subscriber.sender is not asyncio.current_task():
+            subscriber.sender.cancel()
+
+    def drop(self, subscriber: Subscriber, reason: str):
+        """Disconnect a consumer that can't keep up."""
+        if subscriber.websocket not in self.topics.get(subscriber.topic, {}):
+            return
+        self.dropped += 1
+        print(f"⚠️  Dropping slow WebSocket on {subscriber.topic}: {reason}")
+        self.disconnect(subscriber.websocket, subscriber.topic)
+        task = asyncio.create_task(self._close(subscriber.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            # 1013 = try again later
+            await asyncio.wait_for(websocket.close(code=1013), timeout=settings.ws_send_timeout_s)
+        except Exception:
+            pass
+
+    @staticmethod
+    def encode(message: dict) -> str:
+        return json.dumps(jsonable_encoder(message))
+
+    async def send_message(self, websocket: WebSocket, message: dict, topic: str = None) -> bool:
+        """
+        Send to one socket, in order with the topic's broadcasts when
+        subscribed. Returns False instead of raising when the socket has
+        gone (unsubscribed from `topic`, or closed), since callers are often
+        detached tasks with nobody to observe the error.
+        """
+        if topic is not None:
+            subscriber = self.topics.get(topic, {}).get(websocket)
+            if subscriber is None:
+                return False  # disconnected since the request came in
+            return subscriber.offer(self.encode(message))
+        try:
+            await websocket.send_text(self.encode(message))
+            return True
+        except (WebSocketDisconnect, RuntimeError):
+            return False
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+    async def broadcast(self, topic: str, message: dict) -> int:
+        """Fan a message out to every subscriber of `topic`; returns how many got it queued."""
+        return self.publish(topic, message)
 
-    async def send_message(self, websocket: WebSocket, message: dict):
-        await websocket.send_text(json.dumps(message))
+    def publish(self, topic: str, message: dict) -> int:
+        """Synchronous broadcast, for callers outside a coroutine (e.g. fleet listeners)."""
+        subscribers = self.topics.get(topic)
+        if not subscribers:
+            return 0
+        text = self.encode(message)
+        return sum(subscriber.offer(text) for subscriber in list(subscribers.values()))
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            await connection.send_text(json.dumps(message))
+    def stats(self) -> dict:
+        return {
+            "topics": len(self.topics),
+            "subscribers": sum(len(s) for s in self.topics.values()),
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
 
 manager = ConnectionManager()
 
+
+def ambulance_topic(emergency_id: int) -> str:
+    return f"ambulance:{emergency_id}"
+
+
+# Position changes in the fleet state go straight to the emergency's ambulance viewers
+fleet_state.add_listener(
+    lambda emergency_id, message: manager.publish(
+        ambulance_topic(emergency_id), {"status": "ambulance", "data": message}
+    ),
+    wants=lambda emergency_id: ambulance_topic(emergency_id) in manager.topics,
+)
+
+
+class WebSocketRequest:
+    """Legacy emergency payload from a socket message, shaped like EmergencyRequest"""
+    def __init__(self, payload):
+        self.location = type("obj", (), payload["location"])
+        self.symptoms = payload["symptoms"]
+        self.vitals = payload["vitals"]
+        self.age = payload["age"]
+        self.description = payload["description"]
+        self.contact_email = payload["contact_email"]
+
+
+async def handle_request(websocket: WebSocket, emergency_id: str, request_data: dict):
+    """
+    Run one orchestration and stream it: each stage result is broadcast to
+    the emergency's viewers the moment that stage finishes, then the full
+    response. Errors go back to the requesting socket only.
+    """
+    request_id = str(request_data.get("requestId") or uuid.uuid4())
+
+    await manager.send_message(websocket, {
+        "status": "received",
+        "requestId": request_id,
+        "message": f"Emergency request received for {emergency_id}"
+    }, topic=emergency_id)
+
+    async def on_stage(name: str, result, timing: dict):
+        await manager.broadcast(emergency_id, {
+            "status": "stage",
+            "requestId": request_id,
+            "stage": name,
+            "stageStatus": timing["status"],
+            "elapsed_ms": timing.get("elapsed_ms"),
+            "data": result
+        })
+
+    try:
+        response = await orchestrator.handle_emergency(
+            WebSocketRequest(request_data),
+            background_tasks=None,
+            on_stage=on_stage
+        )
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else f"Invalid request: {e!r}"
+        sent = await manager.send_message(websocket, {
+            "status": "error",
+            "requestId": request_id,
+            "detail": detail
+        }, topic=emergency_id)
+        if not sent:
+            print(f"⚠️  Request {request_id} on {emergency_id} failed after its sender left: {detail}")
+        return
+
+    await manager.broadcast(emergency_id, {
+        "status": "completed",
+        "requestId": request_id,
+        "data": response
+    })
+
+
 @router.websocket("/ws/emergency/{emergency_id}")
 async def emergency_websocket(websocket: WebSocket, emergency_id: str):
     """
-    WebSocket endpoint for real-time emergency updates
+    WebSocket endpoint for real-time emergency updates.
+    Every socket subscribes to its emergency's topic; results are broadcast
+    to all viewers of that emergency, acknowledgements only to the sender.
+    Each incoming message runs as its own task, so a second request is not
+    queued behind the first.
     """
-    await manager.connect(websocket)
+    await manager.connect(websocket, emergency_id)
+    in_flight = set()
 
     try:
         while True:
             data = await websocket.receive_text()
-            request_data = json.loads(data)
-
-            await manager.send_message(websocket, {
-                "status": "received",
-                "message": f"Emergency request received for {emergency_id}"
-            })
-
-            # --- Create dummy request object to pass to orchestrator ---
-            class DummyRequest:
-                def __init__(self, payload):
-                    self.location = type("obj", (), payload["location"])
-                    self.symptoms = payload["symptoms"]
-                    self.vitals = payload["vitals"]
-                    self.age = payload["age"]
-                    self.description = payload["description"]
-                    self.contact_email = payload["contact_email"]
-
-            dummy_request = DummyRequest(request_data)
-
-            # Run orchestrator (no background tasks for WS)
-            response = await orchestrator.handle_emergency(
-                dummy_request,
-                background_tasks=None
-            )
-
-            await manager.send_message(websocket, {
-                "status": "completed",
-                "data": response
-            })
+            try:
+                request_data = json.loads(data)
+            except ValueError:
+                await manager.send_message(websocket, {
+                    "status": "error",
+                    "detail": "Message is not valid JSON"
+                }, topic=emergency_id)
+                continue
+
+            if len(in_flight) >= settings.ws_max_inflight_requests:
+                await manager.send_message(websocket, {
+                    "status": "error",
+                    "requestId": request_data.get("requestId"),
+                    "detail": "Too many requests in flight on this connection"
+                }, topic=emergency_id)
+                continue
+
+            # In-flight requests finish even if the sender leaves; other viewers still get them
+            task = asyncio.create_task(handle_request(websocket, emergency_id, request_data))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
         print(f"WebSocket disconnected: {emergency_id}")
+    finally:
+        manager.disconnect(websocket, emergency_id)
+
+
+@router.websocket("/ws/ambulance/{emergency_id}")
+async def ambulance_websocket(websocket: WebSocket, emergency_id: int):
+    """
+    Live ambulance position for an emergency: the current location on
+    connect, then a message whenever the unit visibly moves.
+    """
+    try:
+        tracked = await fleet_state.ensure_tracked(emergency_id)
+    except ValueError:
+        tracked = None  # no location to track
+    if tracked is None:
+        await websocket.close(code=1008)  # policy violation: unknown or unlocated emergency
+        return
+
+    topic = ambulance_topic(emergency_id)
+    await manager.connect(websocket, topic)
+    try:
+        await manager.send_message(websocket, {
+            "status": "ambulance",
+            "data": fleet_state.view(emergency_id)
+        }, topic=topic)
+        while True:
+            await websocket.receive_text()  # inbound messages are ignored
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(websocket, topic)
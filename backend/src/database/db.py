@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON, Text
+from sqlalchemy import create_engine, event, Column, Index, Integer, String, Float, DateTime, JSON, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from datetime import datetime
 import os
 
@@ -25,6 +26,71 @@ engine = create_engine(
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+# SQLite profile applied to every new connection.
+# "production": WAL (readers don't block the writer), synchronous=NORMAL
+# (fsync at checkpoints instead of every commit), memory-mapped reads and
+# a busy timeout so concurrent writers wait instead of failing.
+# "default": leave SQLite's own settings untouched.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+
+SQLITE_PRAGMAS = {
+    "production": [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        "PRAGMA temp_store=MEMORY",
+    ],
+    "default": [],
+}
+if SQLITE_PROFILE not in SQLITE_PRAGMAS:
+    raise ValueError(f"Unknown SQLITE_PROFILE '{SQLITE_PROFILE}', expected one of {list(SQLITE_PRAGMAS)}")
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS[SQLITE_PROFILE]:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _use_sqlite_profile(sync_engine):
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+
+
+_use_sqlite_profile(engine)
+
+
+# Async engine for request handlers, so DB I/O doesn't block the event loop.
+# Same database, async driver (sqlite -> aiosqlite, postgresql -> asyncpg).
+def _async_database_url(url: str) -> str:
+    for sync_prefix, async_prefix in (
+        ("sqlite:///", "sqlite+aiosqlite:///"),
+        ("postgresql://", "postgresql+asyncpg://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_database_url(DATABASE_URL))
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+
+_use_sqlite_profile(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 Base = declarative_base()
 
 
@@ -65,6 +131,15 @@ class Emergency(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
 
+    # Dashboard listing filters one column and pages newest-first by
+    # (created_at, id), so each filter gets a matching composite index
+    __table_args__ = (
+        Index("ix_emergencies_created_at_id", "created_at", "id"),
+        Index("ix_emergencies_status_created_at", "status", "created_at", "id"),
+        Index("ix_emergencies_severity_created_at", "severity", "created_at", "id"),
+        Index("ix_emergencies_assigned_hospital_id", "assigned_hospital_id", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<Emergency(id={self.id}, severity={self.severity}, status={self.status})>"
 
@@ -136,21 +211,55 @@ class Hospital(Base):
     emergency_contact = Column(String(20), nullable=True)
 
     # Metadata
-    last_updated = Column(DateTime, default=datetime.utcnow)
+    # Bumped on every update so the in-memory registry can refresh incrementally
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     def __repr__(self):
         return f"<Hospital(id={self.id}, name={self.name})>"
 
 
+# ============================================
+# TABLE 4: AMBULANCE TRACKS
+# ============================================
+class AmbulanceTrack(Base):
+    """Down-sampled ambulance GPS history (the full-rate feed stays in memory)"""
+    __tablename__ = "ambulance_tracks"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Fix
+    ambulance_id = Column(String(50), nullable=False)
+    recorded_at = Column(DateTime, nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    speed_kmh = Column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("ix_ambulance_tracks_ambulance_id", "ambulance_id", "recorded_at"),
+    )
+
+    def __repr__(self):
+        return f"<AmbulanceTrack(ambulance_id={self.ambulance_id}, recorded_at={self.recorded_at})>"
+
+
 # ============================================
 # DATABASE HELPER FUNCTIONS
 # ============================================
 def init_db():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
+    ensure_indexes()
     print("✅ Database tables created successfully!")
 
 
+def ensure_indexes():
+    """Create indexes added to the models after their tables already existed"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
 def get_db():
     """Get database session (for FastAPI dependency injection)"""
     db = SessionLocal()
@@ -160,6 +269,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Get async database session (FastAPI dependency for non-blocking handlers)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def drop_all_tables():
     """WARNING: Deletes all data! Use only for testing"""
     Base.metadata.drop_all(bind=engine)
@@ -182,6 +297,7 @@ if __name__ == "__main__":
     print("   1. emergencies - Stores emergency incidents")
     print("   2. agent_logs - Tracks agent actions with DIDs")
     print("   3. hospitals - Hospital information and availability")
+    print("   4. ambulance_tracks - Down-sampled ambulance GPS history")
     print()
     print("✅ Database setup complete!")
     print(f"💾 Database file: {DB_FILE_PATH}")
@@ -26,6 +26,11 @@ class TriageInput(BaseModel):
     location: Optional[LocationData] = None
 
 
+class TriageBatch(BaseModel):
+    """Casualty list submitted in one request (mass-casualty intake)"""
+    patients: List[TriageInput] = Field(..., min_length=1)
+
+
 class EmergencyRequest(BaseModel):
     """Legacy schema for backward compatibility"""
     location: LocationData
@@ -34,3 +39,16 @@ class EmergencyRequest(BaseModel):
     age: int
     description: str
     contact_email: str
+
+
+class GpsTrack(BaseModel):
+    """Columnar GPS pings from one vehicle (epoch seconds, degrees, km/h)"""
+    timestamps: List[float]
+    lats: List[float]
+    lngs: List[float]
+    speeds: Optional[List[float]] = None
+
+
+class GpsBatch(BaseModel):
+    """Pings from many vehicles in one request, keyed by ambulance id"""
+    vehicles: Dict[str, GpsTrack]
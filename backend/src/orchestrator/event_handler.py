@@ -1,63 +1,161 @@
 # src/orchestrator/event_handler.py  (or wherever this lives)
 
-from typing import Dict, Any
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.agents.triage_agent import triage_agent
 from src.agents.routing_agent import routing_agent
 from src.agents.notification_agent import notification_agent
-from src.zynd.mock_zynd import zynd_registry
+from src.services.dispatch import dispatch_engine
+from src.services.geo import coords_of
+from src.services.route_context import RouteContext
+from src.orchestrator.stage_executor import Stage, StageExecutor
+from config import get_settings
+
+settings = get_settings()
 
 
 class EmergencyOrchestrator:
     """
     Lightweight Zynd-style orchestrator for simple event-based flows.
     Uses DIDs + registry instead of direct .execute() calls.
+    Triage and routing are independent, so they run concurrently and the
+    notification waits for both. Ambulance dispatch starts as soon as
+    triage has set the priority.
     """
 
     def __init__(self):
         self.triage_did = triage_agent.did
         self.routing_did = routing_agent.did
         self.notification_did = notification_agent.did
+        self.workflow = StageExecutor(
+            [
+                Stage(
+                    "triage",
+                    did=self.triage_did,
+                    payload=lambda ctx: ctx["payload"],
+                    budget_share=0.3,
+                ),
+                Stage(
+                    "routing",
+                    did=self.routing_did,
+                    payload=self._routing_payload,
+                    budget_share=0.6,
+                    fallback=lambda ctx: routing_agent.estimate_best_hospital(
+                        ctx["emergency_coords"],
+                        ctx["payload"].get("candidate_hospitals", []),
+                    ),
+                ),
+                Stage(
+                    "dispatch",
+                    run=self._dispatch,
+                    depends_on=("triage",),
+                    budget_share=0.3,
+                    fallback=lambda ctx: {"ambulance_id": None, "status": "queued"},
+                ),
+                Stage(
+                    "notification",
+                    did=self.notification_did,
+                    payload=self._notification_payload,
+                    depends_on=("triage", "routing"),
+                    budget_share=0.4,
+                ),
+            ]
+        )
+
+    def _routing_payload(self, ctx: dict) -> dict:
+        return {
+            "emergency_location": ctx["emergency_coords"],
+            "hospitals": ctx["payload"].get("candidate_hospitals", []),
+            "route_context": RouteContext(),
+        }
+
+    async def _dispatch(self, ctx: dict):
+        coords = ctx["emergency_coords"]
+        if not coords or None in coords:
+            return None
+        assignment = ctx.get("assignment")
+        if assignment is None:
+            lat, lng = coords
+            assignment = dispatch_engine.request(
+                ctx["emergency_id"], lat, lng, ctx["triage"].get("priority")
+            )
+        if not dispatch_engine.free:
+            # Nothing to wait for; the call is served when a unit comes free
+            return {"ambulance_id": None, "status": "queued"}
+        # On timeout only the wait is cancelled; the call stays queued for a unit
+        return await asyncio.shield(assignment)
 
-    async def handle_emergency(self, emergency_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def _notification_payload(self, ctx: dict) -> dict:
+        payload = ctx["payload"]
+        triage_result = ctx["triage"]
+        return {
+            "emergency_data": {
+                "severity": triage_result["severity"],
+                "priority": triage_result["priority"],
+                "description": payload.get("description", ""),
+                "address": payload.get("address", ""),
+                "contact_email": payload.get("contact_email"),
+            },
+            "hospital_data": ctx["routing"],
+        }
+
+    async def handle_emergency(
+        self,
+        emergency_id: int,
+        payload: Dict[str, Any],
+        triage: Optional[dict] = None,
+        assignment: Optional[asyncio.Future] = None,
+    ) -> Dict[str, Any]:
         """
         Handle emergency with emergency_id and payload.
+        A `triage` result computed by the caller is used as is (the triage
+        stage doesn't run), and an `assignment` future from an earlier
+        dispatch_engine.request() is awaited instead of queueing again.
         """
         print(f"🚨 Orchestrator processing Emergency ID: {emergency_id}")
 
-        # 1️⃣ TRIAGE via Zynd
-        triage_result = await zynd_registry.call(self.triage_did, payload)
-
-        # 2️⃣ ROUTING via Zynd
-        routing_result = await zynd_registry.call(
-            self.routing_did,
-            {
-                "emergency_location": payload.get("location"),
-                "hospitals": payload.get("candidate_hospitals", []),
-            },
-        )
-
-        # 3️⃣ NOTIFICATION via Zynd
-        notification_result = await zynd_registry.call(
-            self.notification_did,
-            {
-                "emergency_data": {
-                    "severity": triage_result["severity"],
-                    "priority": triage_result["priority"],
-                    "description": payload.get("description", ""),
-                    "address": payload.get("address", ""),
-                    "contact_email": payload.get("contact_email"),
-                },
-                "hospital_data": routing_result,
-            },
-        )
+        location = payload.get("location")
+        ctx = {
+            "emergency_id": emergency_id,
+            "payload": payload,
+            "emergency_coords": coords_of(location) if isinstance(location, dict) else location,
+            "triage": triage,
+            "assignment": assignment,
+        }
+        stage_timings = await self.workflow.run(ctx, settings.emergency_deadline_s)
 
         return {
             "emergency_id": emergency_id,
-            "triage": triage_result,
-            "routing": routing_result,
-            "notification": notification_result,
+            "triage": ctx["triage"],
+            "routing": ctx["routing"],
+            "dispatch": ctx["dispatch"],
+            "notification": ctx["notification"],
+            "stage_timings": stage_timings,
         }
 
+    async def handle_batch(
+        self,
+        emergencies: List[Tuple[int, Dict[str, Any], dict, Optional[asyncio.Future]]],
+        concurrency: int,
+    ):
+        """
+        Orchestrate (emergency_id, payload, triage, assignment) tuples,
+        highest priority first, with at most `concurrency` running at once.
+        Triage and dispatch were already done for the whole batch, so each
+        flow reuses them (see handle_emergency).
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(emergency_id: int, payload: Dict[str, Any], triage: dict, assignment):
+            async with semaphore:
+                try:
+                    await self.handle_emergency(emergency_id, payload, triage, assignment)
+                except Exception as e:
+                    print(f"❌ Batch orchestration failed for Emergency ID {emergency_id}: {e!r}")
+
+        # Semaphore waiters are served in order, so RED patients get the first slots
+        ordered = sorted(emergencies, key=lambda item: (item[2]["priority"], item[0]))
+        await asyncio.gather(*(run(*emergency) for emergency in ordered))
 
 orchestrator = EmergencyOrchestrator()
@@ -1,4 +1,6 @@
 from fastapi import HTTPException
+import asyncio
+import time
 import uuid
 
 from src.agents.triage_agent import triage_agent
@@ -6,15 +8,24 @@ from src.agents.hospital_agent import hospital_agent
 from src.agents.routing_agent import routing_agent
 from src.agents.notification_agent import notification_agent
 from src.services.maps_service import maps_service
-from src.database.db import MOCK_HOSPITALS
+from src.services.geo import coords_of
+from src.services.hospital_registry import hospital_registry
+from src.services.eta_grid import eta_grid_store
+from src.services.route_context import RouteContext
+from src.orchestrator.stage_executor import Stage, StageExecutor
 from src.zynd.mock_zynd import zynd_registry
+from config import get_settings
+
+settings = get_settings()
 
 
 class EmergencyOrchestrator:
     """
     Central coordinator that manages the emergency workflow:
-    Triage → Hospital → Routing → Notification
-    Now routed through a Zynd-style registry.
+    (Address ∥ Triage → Hospital → Routing) → Notification
+    Declared as a stage graph of agent DIDs and run by StageExecutor, so
+    independent stages overlap and each one gets a slice of the
+    per-emergency deadline with a fallback when it overruns.
     """
 
     def __init__(self):
@@ -22,78 +33,154 @@ class EmergencyOrchestrator:
         self.hospital_did = hospital_agent.did
         self.routing_did = routing_agent.did
         self.notification_did = notification_agent.did
+        self._background = set()
+        self.workflow = StageExecutor(
+            [
+                # Address only feeds the notification; runs alongside everything
+                Stage(
+                    "address",
+                    run=self._resolve_address,
+                    budget_share=0.5,
+                    fallback=lambda ctx: "Unknown Location",
+                ),
+                Stage(
+                    "triage",
+                    did=self.triage_did,
+                    payload=self._triage_payload,
+                    budget_share=0.2,
+                ),
+                Stage(
+                    "hospitals",
+                    did=self.hospital_did,
+                    payload=self._hospital_payload,
+                    depends_on=("triage",),
+                    budget_share=0.5,
+                    fallback=lambda ctx: hospital_agent.estimate_suitable_hospitals(
+                        self._hospital_payload(ctx)
+                    ),
+                ),
+                Stage(
+                    "routing",
+                    did=self.routing_did,
+                    payload=self._routing_payload,
+                    depends_on=("hospitals",),
+                    budget_share=0.4,
+                    fallback=lambda ctx: routing_agent.estimate_best_hospital(
+                        ctx["emergency_coords"], ctx["hospitals"]
+                    ),
+                ),
+            ]
+        )
 
-    async def handle_emergency(self, request, background_tasks):
-        request_id = str(uuid.uuid4())
+    # ---------- stage inputs ----------
+
+    async def _resolve_address(self, ctx: dict):
+        lat, lng = ctx["emergency_coords"]
+        return await maps_service.get_location_address(lat, lng)
 
-        # 1️⃣ TRIAGE via Zynd
-        triage_input = {
+    def _triage_payload(self, ctx: dict) -> dict:
+        request = ctx["request"]
+        return {
             "symptoms": request.symptoms,
             "vitals": request.vitals,
             "age": request.age,
         }
-        triage_result = await zynd_registry.call(self.triage_did, triage_input)
 
-        # 2️⃣ Address from maps_service
-        address = await maps_service.get_location_address(
-            request.location.lat, request.location.lng
-        )
-        emergency_coords = (request.location.lat, request.location.lng)
-
-        # 3️⃣ HOSPITALS via Zynd
-        top_hospitals = await zynd_registry.call(
-            self.hospital_did,
-            {
-                "severity": triage_result["severity"],
-                "location": emergency_coords,
-                "required_specialists": triage_result["recommended_specialists"],
-                "hospital_db": MOCK_HOSPITALS,
-            },
+    def _hospital_payload(self, ctx: dict) -> dict:
+        triage_result = ctx["triage"]
+        return {
+            "severity": triage_result["severity"],
+            "location": ctx["emergency_coords"],
+            "required_specialists": triage_result["recommended_specialists"],
+            "hospital_db": hospital_registry.all(),
+            "hospital_index": hospital_registry.index,
+            "route_context": ctx["route_context"],
+            "eta_grid": eta_grid_store,
+        }
+
+    def _routing_payload(self, ctx: dict) -> dict:
+        return {
+            "emergency_location": ctx["emergency_coords"],
+            "hospitals": [
+                {"id": h["id"], "name": h["name"], "coords": coords_of(h)}
+                for h in ctx["hospitals"]
+            ],
+            "route_context": ctx["route_context"],
+        }
+
+    async def _notify(self, notification: dict, on_stage=None):
+        """Send the notification; report its outcome as a final pseudo-stage."""
+        started = time.perf_counter()
+        result, status = None, "ok"
+        try:
+            result = await zynd_registry.call(self.notification_did, notification)
+        except Exception as e:
+            print(f"❌ Notification failed: {e!r}")
+            status = "error"
+        if on_stage is not None:
+            await StageExecutor.report_stage(on_stage, "notification", result, {
+                "status": status,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            })
+        return result
+
+    async def handle_emergency(self, request, background_tasks, on_stage=None):
+        """
+        Run the workflow for one request. `on_stage(name, result, timing)`
+        is called as each stage (and finally the notification) completes.
+        """
+        request_id = str(uuid.uuid4())
+
+        ctx = {
+            "request": request,
+            "emergency_coords": (request.location.lat, request.location.lng),
+            # Shared by every agent in this flow so no route is fetched twice
+            "route_context": RouteContext(),
+        }
+        stage_timings = await self.workflow.run(
+            ctx, settings.emergency_deadline_s, on_stage=on_stage
         )
 
+        triage_result = ctx["triage"]
+        top_hospitals = ctx["hospitals"]
+        best_hospital = ctx["routing"]
+
+        if not triage_result:
+            raise HTTPException(
+                status_code=503, detail="Triage did not complete in time"
+            )
         if not top_hospitals:
             raise HTTPException(
                 status_code=404, detail="No suitable hospitals found"
             )
-
-        routing_candidates = [
-            {"id": h["id"], "name": h["name"], "coords": h["coords"]}
-            for h in top_hospitals
-        ]
-
-        # 4️⃣ ROUTING via Zynd
-        best_hospital = await zynd_registry.call(
-            self.routing_did,
-            {
-                "emergency_location": emergency_coords,
-                "hospitals": routing_candidates,
-            },
-        )
-
         if not best_hospital:
             raise HTTPException(
                 status_code=404, detail="No reachable hospitals found"
             )
 
-        # 5️⃣ NOTIFICATION via Zynd (background)
+        # NOTIFICATION via Zynd (background)
         emergency_data = {
             "severity": triage_result["severity"],
             "priority": triage_result["priority"],
             "description": request.description,
-            "address": address,
+            "address": ctx["address"],
             "contact_email": request.contact_email,
         }
 
-        background_tasks.add_task(
-            zynd_registry.call,
-            self.notification_did,
-            {
-                "emergency_data": emergency_data,
-                "hospital_data": best_hospital,
-            },
-        )
-
-        # 6️⃣ RESPONSE
+        notification = {
+            "emergency_data": emergency_data,
+            "hospital_data": best_hospital,
+        }
+        if background_tasks is not None:
+            background_tasks.add_task(self._notify, notification, on_stage)
+        else:
+            # WebSocket callers have no BackgroundTasks; fire and forget
+            # (keep a reference so the task isn't garbage-collected mid-send)
+            task = asyncio.create_task(self._notify(notification, on_stage))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+        # RESPONSE
         return {
             "request_id": request_id,
             "status": "success",
@@ -101,7 +188,13 @@ class EmergencyOrchestrator:
             "assigned_hospital": best_hospital["name"],
             "eta_minutes": best_hospital["route_info"]["duration_min"],
             "top_hospitals": top_hospitals,
-            "detected_address": address,
+            "detected_address": ctx["address"],
+            # Hospitals whose ETA came from a speed-profile estimate, not OSRM
+            "estimated_eta_hospitals": [
+                h["id"] for h in top_hospitals if h.get("estimated")
+            ],
+            "eta_estimated": bool(best_hospital["route_info"].get("estimated")),
+            "stage_timings": stage_timings,
         }
 
 
@@ -0,0 +1,226 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from src.zynd.mock_zynd import zynd_registry
+from src.services.metrics import STAGE_LATENCY
+
+
+class Stage:
+    """
+    One node of an emergency workflow.
+
+    A stage either calls an agent by DID through the Zynd registry (`did` +
+    `payload`, which builds the agent payload from the workflow context) or
+    runs a local coroutine (`run`). `budget_share` is the fraction of the
+    per-emergency deadline the stage may use; where the shares along a
+    dependency chain add up to more than 1 they are scaled down together
+    (see StageExecutor). `fallback(context)` supplies a result when the
+    stage overruns or fails.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        did: str = None,
+        payload: Callable[[dict], dict] = None,
+        run: Callable[[dict], Awaitable[Any]] = None,
+        depends_on: Iterable[str] = (),
+        budget_share: float = 1.0,
+        fallback: Optional[Callable[[dict], Any]] = None,
+    ):
+        if (did is None) == (run is None):
+            raise ValueError(f"Stage '{name}' needs exactly one of did or run")
+        self.name = name
+        self.did = did
+        self.payload = payload or (lambda context: {})
+        self.run = run
+        self.depends_on = tuple(depends_on)
+        self.budget_share = budget_share
+        self.fallback = fallback
+
+
+class StageExecutor:
+    """
+    Runs a DAG of stages against a shared context dict.
+
+    Every stage starts as soon as all of its dependencies have finished, so
+    independent stages run concurrently. Budget shares are normalised so
+    that no chain of dependent stages is promised more than the whole
+    deadline: each share is divided by the largest share total of any chain
+    through its stage (when that exceeds 1). A stage's timeout is the
+    smaller of its normalised share and the time left before the overall
+    deadline, so the last stage of an over-budget chain is no longer cut to
+    whatever its predecessors left over. The result of each stage is stored
+    in the context under its name. A stage whose dependency produced no
+    result is skipped, and one whose result is already in the context is
+    not run again. Agent calls are tagged with `context["emergency_id"]`
+    when the flow has one.
+    """
+
+    def __init__(self, stages: Iterable[Stage], registry=zynd_registry):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage '{stage.name}'")
+            self.stages[stage.name] = stage
+        self.registry = registry
+        self._check_graph()
+        self.shares = self._normalised_shares()
+
+    def _check_graph(self):
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle in workflow at stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _normalised_shares(self) -> Dict[str, float]:
+        """Budget share per stage, scaled so every dependency chain sums to at most 1."""
+        before: Dict[str, float] = {}  # heaviest chain ending at the stage
+        after: Dict[str, float] = {}  # heaviest chain starting at the stage
+
+        def chain_to(name: str) -> float:
+            if name not in before:
+                stage = self.stages[name]
+                before[name] = stage.budget_share + max(
+                    (chain_to(dep) for dep in stage.depends_on), default=0.0
+                )
+            return before[name]
+
+        dependents: Dict[str, list] = {name: [] for name in self.stages}
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                dependents[dep].append(stage.name)
+
+        def chain_from(name: str) -> float:
+            if name not in after:
+                after[name] = self.stages[name].budget_share + max(
+                    (chain_from(child) for child in dependents[name]), default=0.0
+                )
+            return after[name]
+
+        shares = {}
+        for name, stage in self.stages.items():
+            through = chain_to(name) + chain_from(name) - stage.budget_share
+            shares[name] = stage.budget_share / max(through, 1.0)
+        return shares
+
+    async def _invoke(self, stage: Stage, context: dict):
+        if stage.run is not None:
+            return await stage.run(context)
+        return await self.registry.call(
+            stage.did, stage.payload(context), emergency_id=context.get("emergency_id")
+        )
+
+    @staticmethod
+    async def report_stage(on_stage, name: str, result, timing: dict):
+        # A failing listener (e.g. a closed socket) must not break the workflow
+        try:
+            outcome = on_stage(name, result, timing)
+            if hasattr(outcome, "__await__"):
+                await outcome
+        except Exception as e:
+            print(f"⚠️  Stage listener failed for '{name}': {e!r}")
+
+    async def run(
+        self,
+        context: dict,
+        deadline_s: float,
+        on_stage: Optional[Callable[[str, Any, dict], Any]] = None,
+    ) -> Dict[str, dict]:
+        """
+        Execute all stages; results land in `context[stage.name]`.
+        Returns per-stage timings: status (ok / fallback / timeout / error /
+        skipped / provided), start offset, elapsed time and budget in milliseconds.
+        `on_stage(name, result, timing)` is called as soon as each stage
+        finishes, so callers can stream partial results.
+        """
+        started = time.perf_counter()
+        deadline = started + deadline_s
+        timings: Dict[str, dict] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage):
+            for dep in stage.depends_on:
+                await tasks[dep]
+
+            stage_start = time.perf_counter()
+            budget = max(min(self.shares[stage.name] * deadline_s, deadline - stage_start), 0)
+            timing = {
+                "status": "ok",
+                "started_ms": round((stage_start - started) * 1000, 1),
+                "budget_ms": round(budget * 1000, 1),
+            }
+            timings[stage.name] = timing
+
+            provided = context.get(stage.name)
+            if provided is not None:
+                # Result supplied by the caller (e.g. batch triage); don't redo it
+                timing.update(status="provided", elapsed_ms=0.0)
+                if on_stage is not None:
+                    await self.report_stage(on_stage, stage.name, provided, timing)
+                return
+
+            if any(context.get(dep) is None for dep in stage.depends_on):
+                context[stage.name] = None
+                timing.update(status="skipped", elapsed_ms=0.0)
+                if on_stage is not None:
+                    await self.report_stage(on_stage, stage.name, None, timing)
+                return
+
+            result = None
+            try:
+                result = await asyncio.wait_for(self._invoke(stage, context), timeout=budget)
+            except asyncio.TimeoutError:
+                timing["status"] = "timeout"
+            except Exception as e:
+                print(f"❌ Stage '{stage.name}' failed: {e!r}")
+                timing["status"] = "error"
+
+            if timing["status"] != "ok" and stage.fallback is not None:
+                timing["reason"] = timing["status"]
+                timing["status"] = "fallback"
+                try:
+                    result = stage.fallback(context)
+                    if hasattr(result, "__await__"):
+                        result = await result
+                except Exception as e:
+                    # Dependents are skipped; sibling stages carry on
+                    print(f"❌ Fallback for stage '{stage.name}' failed: {e!r}")
+                    timing["status"] = "error"
+                    result = None
+
+            context[stage.name] = result
+            elapsed = time.perf_counter() - stage_start
+            timing["elapsed_ms"] = round(elapsed * 1000, 1)
+            STAGE_LATENCY.observe(elapsed, stage.name, timing["status"])
+            if on_stage is not None:
+                await self.report_stage(on_stage, stage.name, result, timing)
+
+        for name, stage in self.stages.items():
+            tasks[name] = asyncio.create_task(run_stage(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            # Don't leave sibling stages running detached from a failed workflow
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return {name: timings[name] for name in self.stages}
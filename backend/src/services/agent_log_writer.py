@@ -0,0 +1,186 @@
+import asyncio
+import re
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert
+
+from src.database.db import SessionLocal, AgentLog
+from config import get_settings
+
+settings = get_settings()
+
+# did:zynd:agent_triage_abc123 / did:zynd:agent:triage:abc123 -> "triage"
+_AGENT_TYPE = re.compile(r"agent[_:]([a-z]+)")
+
+# Payloads carry whole hospital lists and index objects; keep logs small
+MAX_LOGGED_ITEMS = 10
+MAX_LOGGED_DEPTH = 4
+
+
+def agent_type_of(did: str) -> str:
+    match = _AGENT_TYPE.search(did)
+    return match.group(1) if match else "unknown"
+
+
+def loggable(value, depth: int = 0):
+    """JSON-safe, size-capped copy of an agent payload or result."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if depth >= MAX_LOGGED_DEPTH:
+        return f"<{type(value).__name__}>"
+    if isinstance(value, dict):
+        return {str(k): loggable(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [loggable(v, depth + 1) for v in value[:MAX_LOGGED_ITEMS]]
+        if len(value) > MAX_LOGGED_ITEMS:
+            items.append(f"<{len(value) - MAX_LOGGED_ITEMS} more>")
+        return items
+    if hasattr(value, "model_dump"):
+        return loggable(value.model_dump(), depth)
+    return f"<{type(value).__name__}>"
+
+
+class AgentLogWriter:
+    """
+    Write-behind recorder for the AgentLog table.
+
+    `record()` only appends to a bounded in-memory queue, so agent hops never
+    wait on the database. A background task drains the queue in bulk inserts
+    whenever `batch_size` entries are waiting or `flush_interval_s` has
+    passed. When the queue is full, new entries are dropped and counted.
+    Entries are only queued while the writer is running (app lifespan).
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_queue: int = None,
+        batch_size: int = None,
+        flush_interval_s: float = None,
+    ):
+        self.session_factory = session_factory
+        self.max_queue = max_queue or settings.agent_log_queue_max
+        self.batch_size = batch_size or settings.agent_log_batch_size
+        self.flush_interval_s = flush_interval_s or settings.agent_log_flush_interval_s
+        self._queue = deque()
+        self._wake: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._flusher is not None
+
+    def record(
+        self,
+        did: str,
+        agent_name: str,
+        payload: dict,
+        result,
+        elapsed_ms: float,
+        emergency_id: int = None,
+        error: Exception = None,
+    ):
+        if not self.running:
+            return
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.append(
+            (did, agent_name, payload, result, elapsed_ms, emergency_id, error, datetime.utcnow())
+        )
+        self.recorded += 1
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    @staticmethod
+    def _status(error) -> str:
+        if error is None:
+            return "SUCCESS"
+        if isinstance(error, asyncio.CancelledError):
+            return "CANCELLED"  # stage deadline or request cancelled mid-call
+        return "FAILED"
+
+    @classmethod
+    def _row(cls, entry) -> dict:
+        did, agent_name, payload, result, elapsed_ms, emergency_id, error, timestamp = entry
+        status = cls._status(error)
+        return {
+            "agent_id": did,
+            "agent_type": agent_type_of(did),
+            "agent_name": agent_name,
+            # Not every flow knows its emergency id (the column is NOT NULL)
+            "emergency_id": emergency_id or 0,
+            "action": f"{agent_type_of(did)} call" + ("" if error is None else f" {status.lower()}"),
+            "input_data": loggable(payload),
+            "output_data": loggable(result),
+            "processing_time_ms": int(round(elapsed_ms)),
+            "success": status,
+            "error_message": repr(error) if error is not None else None,
+            "timestamp": timestamp,
+        }
+
+    def _insert(self, rows):
+        db = self.session_factory()
+        try:
+            db.execute(insert(AgentLog), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    async def flush(self):
+        """Write everything queued so far, one bulk insert per batch."""
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            # Serialize on the loop (payloads may still be shared), insert in a thread
+            rows = [self._row(entry) for entry in batch]
+            try:
+                await asyncio.to_thread(self._insert, rows)
+                self.written += len(rows)
+            except Exception as e:
+                self.failed += len(rows)
+                print(f"❌ AgentLog flush failed, {len(rows)} entries lost: {e}")
+
+    async def _flush_forever(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def start(self):
+        if self._flusher is None:
+            self._wake = asyncio.Event()
+            self._flusher = asyncio.create_task(self._flush_forever())
+
+    async def stop(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+agent_log_writer = AgentLogWriter()
@@ -0,0 +1,332 @@
+"""
+Ambulance dispatch.
+
+Free units (those on the roster, reporting GPS recently and not on a job)
+live in a SpatialIndex kept current from the fleet state. Requests are not served one by one:
+the first request opens a short batch window, and everything that arrives
+inside it is assigned jointly. The assignment minimises the sum of
+priority-weighted ETAs over the nearest candidate units of each request
+(Hungarian algorithm), so in a burst a unit is not handed greedily to
+whichever call came first while a RED patient next to it waits for one
+from across town. Requests nobody can serve stay queued until a unit is
+released.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+from sqlalchemy import update
+
+from src.database.db import AsyncSessionLocal, Emergency
+from src.services.fleet_state import fleet_state
+from src.services.geo import AMBULANCE_SPEED_KMH, haversine_km_batch
+from src.services.spatial_index import SpatialIndex
+from config import get_settings
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # optional; the built-in solver gives the same assignment
+    linear_sum_assignment = None
+
+settings = get_settings()
+
+INFEASIBLE = 1e9  # cost of pairing a request with a unit outside its candidates
+
+
+def hungarian(cost) -> tuple:
+    """
+    Minimum-cost assignment for a rectangular cost matrix, as (rows, cols)
+    index arrays like scipy's linear_sum_assignment. Shortest augmenting
+    path with row/column potentials, O(n^2 m) with the inner scan in numpy.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.shape[0] > cost.shape[1]:
+        cols, rows = hungarian(cost.T)
+        order = np.argsort(rows)
+        return rows[order], cols[order]
+
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # owner[j] = 1-based row matched to column j
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for row in range(1, n + 1):
+        owner[0] = row
+        column = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current_row = owner[column]
+            slack = cost[current_row - 1] - u[current_row] - v[1:]
+            free = ~used[1:]
+            better = free & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = column
+
+            candidates = np.where(free, min_slack[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_slack[~used] -= delta
+
+            column = next_column
+            if owner[column] == 0:
+                break
+
+        while column:  # flip the augmenting path
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    matched = np.flatnonzero(owner[1:]) + 1
+    rows = owner[matched] - 1
+    order = np.argsort(rows)
+    return rows[order], matched[order] - 1
+
+
+def solve_assignment(cost) -> tuple:
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(cost)
+    return hungarian(cost)
+
+
+def priority_weights() -> Dict[int, float]:
+    """Triage priority (1 = RED) -> ETA cost multiplier, from settings."""
+    weights = [float(w) for w in settings.dispatch_priority_weights.split(",")]
+    return {priority: weight for priority, weight in enumerate(weights, start=1)}
+
+
+class DispatchRequest:
+    def __init__(self, emergency_id: int, lat: float, lng: float, priority: int):
+        self.emergency_id = emergency_id
+        self.lat = lat
+        self.lng = lng
+        self.priority = priority
+        self.queued_at = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class DispatchEngine:
+    """Availability tracking plus batch-window joint assignment (see module docstring)."""
+
+    def __init__(self, fleet=fleet_state):
+        self.fleet = fleet
+        self.free = SpatialIndex(settings.dispatch_index_cell_deg)
+        self.busy: Dict[str, int] = {}  # ambulance id -> emergency id
+        self.assignments: Dict[int, dict] = {}  # emergency id -> assignment, while the unit is busy
+        self.pending: Dict[int, DispatchRequest] = {}
+        self._solver: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()  # one batch is solved at a time
+        self._background: Set[asyncio.Task] = set()
+        self.roster: Set[str] = {u.strip() for u in settings.dispatch_roster.split(",") if u.strip()}
+        self.assigned = 0
+        self.batches = 0
+        fleet.add_unit_listener(self._on_unit)
+
+    def _on_unit(self, ambulance_id: str, unit: Optional[dict]):
+        if unit is None:  # evicted from the fleet (stopped reporting)
+            self.free.remove(ambulance_id)
+            return
+        # Simulated placeholders aren't real vehicles, and only rostered units are dispatched
+        if ambulance_id in self.busy or self.fleet.is_simulated(ambulance_id):
+            return
+        if self.roster and ambulance_id not in self.roster:
+            return
+        if ambulance_id not in self.free and self.pending:
+            self._schedule()  # a unit came into service while calls are waiting
+        self.free.upsert(
+            ambulance_id, unit["lat"], unit["lng"],
+            {"id": ambulance_id, "lat": unit["lat"], "lng": unit["lng"]},
+        )
+
+    # ---------- requests ----------
+
+    def request(self, emergency_id: int, lat: float, lng: float, priority: int = 3) -> asyncio.Future:
+        """
+        Queue an emergency for dispatch; the future resolves with
+        {"ambulance_id", "eta_min", "distance_km"} once a unit is assigned.
+        """
+        if lat is None or lng is None:
+            raise ValueError(f"Emergency {emergency_id} has no location to dispatch to")
+        existing = self.pending.get(emergency_id)
+        if existing is not None:
+            return existing.future
+        if emergency_id in self.assignments:
+            done = asyncio.get_running_loop().create_future()
+            done.set_result(self.assignments[emergency_id])
+            return done
+        request = DispatchRequest(emergency_id, lat, lng, priority or 3)
+        self.pending[emergency_id] = request
+        self._schedule()
+        return request.future
+
+    def release(self, ambulance_id: str) -> bool:
+        """Put a unit back in service (job finished); queued requests are retried."""
+        emergency_id = self.busy.pop(ambulance_id, None)
+        if emergency_id is None:
+            return False
+        self.assignments.pop(emergency_id, None)
+        unit = self.fleet.units.get(ambulance_id)
+        if unit is not None:
+            self._on_unit(ambulance_id, unit)
+        if self.pending:
+            self._schedule()
+        return True
+
+    def _schedule(self):
+        if self._solver is None:
+            self._solver = asyncio.create_task(self._solve_after(settings.dispatch_batch_window_s))
+
+    async def _solve_after(self, delay_s: float):
+        await asyncio.sleep(delay_s)
+        self._solver = None
+        try:
+            await self.solve()
+        except Exception as e:
+            print(f"❌ Dispatch batch failed: {e!r}")
+
+    # ---------- assignment ----------
+
+    def _problem(self, requests: List[DispatchRequest]) -> Optional[dict]:
+        """
+        Cost matrix for a batch: priority-weighted ETA from each request to
+        its nearest free units. Pairs outside a request's shortlist are
+        infeasible; leaving a request unserved costs
+        `dispatch_unserved_penalty_min` times its priority weight, so scarce
+        units go to the highest priorities.
+        """
+        candidates: Dict[str, dict] = {}
+        allowed = []
+        now = time.time()
+        stale: Set[str] = set()
+
+        def fresh(payload: dict) -> bool:
+            # A unit silent for too long may be off shift; its position can't be trusted
+            if self.fleet.is_stale(payload["id"], now):
+                stale.add(payload["id"])
+                return False
+            return True
+
+        # Clustered calls share their nearest units; widening each shortlist
+        # by the batch size guarantees a full matching when enough units exist
+        k = settings.dispatch_candidates_per_request + len(requests) - 1
+        for request in requests:
+            nearby = self.free.nearest(
+                request.lat, request.lng,
+                k=k,
+                max_radius_km=settings.dispatch_max_radius_km,
+                predicate=fresh,
+            )
+            allowed.append({payload["id"] for _, payload in nearby})
+            for _, payload in nearby:
+                candidates[payload["id"]] = payload
+        for ambulance_id in stale:
+            self.free.remove(ambulance_id)
+        if not candidates:
+            return None
+
+        unit_ids = list(candidates)
+        lats = np.array([candidates[u]["lat"] for u in unit_ids])
+        lngs = np.array([candidates[u]["lng"] for u in unit_ids])
+        distance = np.stack([haversine_km_batch(r.lat, r.lng, lats, lngs) for r in requests])
+        eta = distance / AMBULANCE_SPEED_KMH * 60
+
+        weights = priority_weights()
+        weight = np.array([weights.get(r.priority, min(weights.values())) for r in requests])
+        mask = np.array([[u in a for u in unit_ids] for a in allowed])
+        cost = np.where(mask, eta * weight[:, None], INFEASIBLE)
+        # One "unserved" column per request keeps the problem feasible
+        unserved = np.tile((settings.dispatch_unserved_penalty_min * weight)[:, None], len(requests))
+        return {
+            "unit_ids": unit_ids,
+            "eta": eta,
+            "distance": distance,
+            "mask": mask,
+            "cost": np.hstack([cost, unserved]),
+        }
+
+    @staticmethod
+    def _assignments(requests: List[DispatchRequest], problem: dict, rows, cols) -> List[tuple]:
+        unit_ids, eta, distance = problem["unit_ids"], problem["eta"], problem["distance"]
+        return [
+            (requests[i], unit_ids[j], round(float(eta[i, j]), 1), round(float(distance[i, j]), 2))
+            for i, j in zip(rows.tolist(), cols.tolist())
+            if j < len(unit_ids) and problem["mask"][i, j]
+        ]
+
+    def plan(self, requests: List[DispatchRequest]) -> List[tuple]:
+        """
+        Joint assignment for a batch: [(request, ambulance_id, eta_min,
+        distance_km)] for requests that got a unit.
+        """
+        problem = self._problem(requests)
+        if problem is None:
+            return []
+        return self._assignments(requests, problem, *solve_assignment(problem["cost"]))
+
+    async def solve(self):
+        """Assign every pending request that can be served right now."""
+        async with self._lock:
+            requests = [r for r in self.pending.values() if not r.future.done()]
+            if not requests:
+                self.pending.clear()
+                return
+            self.batches += 1
+            problem = self._problem(requests)
+            if problem is None:
+                return
+            # O(n^2 m) for a burst of n calls; keep it off the event loop
+            rows, cols = await asyncio.to_thread(solve_assignment, problem["cost"])
+            self._apply(requests, self._assignments(requests, problem, rows, cols))
+
+    def _apply(self, requests: List[DispatchRequest], assignments: List[tuple]):
+        for request, ambulance_id, eta_min, distance_km in assignments:
+            self.free.remove(ambulance_id)
+            self.busy[ambulance_id] = request.emergency_id
+            del self.pending[request.emergency_id]
+            self.fleet.track_emergency(request.emergency_id, request.lat, request.lng, ambulance_id)
+            assignment = {"ambulance_id": ambulance_id, "eta_min": eta_min, "distance_km": distance_km}
+            self.assignments[request.emergency_id] = assignment
+            request.future.set_result(assignment)
+        self.assigned += len(assignments)
+        if assignments:
+            print(f"🚑 Dispatched {len(assignments)}/{len(requests)} queued emergencies")
+            task = asyncio.create_task(self._persist(assignments))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _persist(self, assignments: List[tuple]):
+        """Write assigned_ambulance_id for the whole batch in one transaction."""
+        rows = [
+            {
+                "id": request.emergency_id,
+                "assigned_ambulance_id": ambulance_id,
+                "estimated_arrival_time": f"{max(int(round(eta_min)), 1)} minutes",
+                "updated_at": datetime.utcnow(),
+            }
+            for request, ambulance_id, eta_min, _ in assignments
+        ]
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(update(Emergency), rows)
+                await db.commit()
+        except Exception as e:
+            print(f"❌ Saving ambulance assignments failed: {e!r}")
+
+    def stats(self) -> dict:
+        return {
+            "free": len(self.free),
+            "busy": len(self.busy),
+            "pending": len(self.pending),
+            "assigned": self.assigned,
+            "batches": self.batches,
+            "solver": "scipy" if linear_sum_assignment is not None else "builtin",
+        }
+
+
+dispatch_engine = DispatchEngine()
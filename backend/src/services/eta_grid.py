@@ -0,0 +1,226 @@
+"""
+Precomputed hospital ETA grid.
+
+The service area is cut into cells of `cell_deg` degrees; for every cell
+centre the builder routes to every hospital once (OSRM, or the local road
+graph when OSRM is down) and stores travel time and distance in a
+(rows, cols, hospitals, 2) float32 .npy, with a JSON sidecar describing the
+grid. At runtime the array is memory-mapped, so a lookup is an index
+computation plus one page read.
+
+One grid is built per time-of-day band; the store answers from the band
+covering the current hour:
+
+    python -m src.services.eta_grid --band morning_peak --hours 7-10 --traffic-factor 1.4
+    python -m src.services.eta_grid --band off_peak --hours 0-23
+"""
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.services.geo import coords_of
+from config import get_settings
+
+settings = get_settings()
+
+KM_PER_DEG_LAT = 111.32
+DURATION, DISTANCE = 0, 1  # last axis of the grid array
+
+
+def _band_paths(directory: str, band: str):
+    base = os.path.join(directory, f"eta_grid_{band}")
+    return base + ".npy", base + ".json"
+
+
+class EtaGrid:
+    """One band: read-only memory-mapped travel times from cell centres to hospitals."""
+
+    def __init__(self, meta: dict, array_path: str):
+        self.meta = meta
+        self.band = meta["band"]
+        self.start_hour, self.end_hour = meta["hours"]
+        self.cell_deg = meta["cell_deg"]
+        self.min_lat, self.min_lng = meta["min_lat"], meta["min_lng"]
+        self.rows, self.cols = meta["rows"], meta["cols"]
+        self.values = np.load(array_path, mmap_mode="r")
+        self._column: Dict[str, int] = {hid: i for i, hid in enumerate(meta["hospital_ids"])}
+
+    def covers_hour(self, hour: int) -> bool:
+        if self.start_hour <= self.end_hour:
+            return self.start_hour <= hour <= self.end_hour
+        return hour >= self.start_hour or hour <= self.end_hour  # wraps midnight
+
+    def cell(self, lat: float, lng: float) -> Optional[tuple]:
+        row = int((lat - self.min_lat) // self.cell_deg)
+        col = int((lng - self.min_lng) // self.cell_deg)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def legs(self, origin: tuple, hospital_ids: List[str]) -> Optional[list]:
+        """
+        {"distance_km", "duration_min", "precomputed": True} per hospital id,
+        None for hospitals not in the grid or unreachable from the cell;
+        None overall when the origin is outside the grid.
+        """
+        cell = self.cell(*origin)
+        if cell is None:
+            return None
+        row = np.asarray(self.values[cell[0], cell[1]])
+        legs = []
+        for hospital_id in hospital_ids:
+            column = self._column.get(hospital_id)
+            if column is None or np.isnan(row[column, DURATION]):
+                legs.append(None)
+                continue
+            legs.append({
+                "distance_km": round(float(row[column, DISTANCE]), 2),
+                "duration_min": round(float(row[column, DURATION]), 0),
+                "precomputed": True,
+            })
+        return legs
+
+
+class EtaGridStore:
+    """All band grids found in `directory`; lookups use the band for the current hour."""
+
+    def __init__(self, directory: str = ""):
+        self.directory = directory
+        self.grids: List[EtaGrid] = []
+
+    def load(self):
+        grids = []
+        if self.directory and os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                if not (name.startswith("eta_grid_") and name.endswith(".json")):
+                    continue
+                with open(os.path.join(self.directory, name)) as f:
+                    meta = json.load(f)
+                array_path, _ = _band_paths(self.directory, meta["band"])
+                try:
+                    grids.append(EtaGrid(meta, array_path))
+                except (OSError, ValueError) as e:
+                    print(f"❌ ETA grid {meta['band']} unreadable: {e}")
+        self.grids = grids
+        if grids:
+            print(f"🗺️  ETA grids loaded: {', '.join(g.band for g in grids)}")
+
+    def current(self, now: datetime = None) -> Optional[EtaGrid]:
+        hour = (now or datetime.now()).hour
+        for grid in self.grids:
+            if grid.covers_hour(hour):
+                return grid
+        return None
+
+    def legs(self, origin: tuple, hospital_ids: List[str], now: datetime = None) -> Optional[list]:
+        grid = self.current(now)
+        return grid.legs(origin, hospital_ids) if grid is not None else None
+
+
+eta_grid_store = EtaGridStore(settings.eta_grid_dir)
+
+
+# ---------- offline builder ----------
+
+def grid_bounds(hospitals: list, cell_deg: float, padding_km: float) -> dict:
+    lats = np.array([coords_of(h)[0] for h in hospitals])
+    lngs = np.array([coords_of(h)[1] for h in hospitals])
+    pad_lat = padding_km / KM_PER_DEG_LAT
+    pad_lng = padding_km / (KM_PER_DEG_LAT * np.cos(np.radians(lats.mean())))
+    min_lat, min_lng = lats.min() - pad_lat, lngs.min() - pad_lng
+    return {
+        "min_lat": float(min_lat),
+        "min_lng": float(min_lng),
+        "rows": int(np.ceil((lats.max() + pad_lat - min_lat) / cell_deg)),
+        "cols": int(np.ceil((lngs.max() + pad_lng - min_lng) / cell_deg)),
+    }
+
+
+async def build_grid(band: str, hours: tuple, cell_deg: float, padding_km: float,
+                     traffic_factor: float, directory: str, concurrency: int) -> str:
+    from src.services.hospital_registry import hospital_registry
+    from src.services.maps_service import maps_service
+
+    hospitals = hospital_registry.all()
+    destinations = [coords_of(h) for h in hospitals]
+    bounds = grid_bounds(hospitals, cell_deg, padding_km)
+    rows, cols = bounds["rows"], bounds["cols"]
+
+    os.makedirs(directory, exist_ok=True)
+    array_path, meta_path = _band_paths(directory, band)
+    values = np.lib.format.open_memmap(
+        array_path + ".tmp", mode="w+", dtype=np.float32, shape=(rows, cols, len(hospitals), 2)
+    )
+    values[:] = np.nan
+
+    semaphore = asyncio.Semaphore(concurrency)
+    done = 0
+
+    async def fill(row: int, col: int):
+        nonlocal done
+        centre = (
+            bounds["min_lat"] + (row + 0.5) * cell_deg,
+            bounds["min_lng"] + (col + 0.5) * cell_deg,
+        )
+        async with semaphore:
+            travel = await maps_service.get_travel_matrix(centre, destinations)
+        for column, leg in enumerate(travel):
+            # Speed-profile estimates are what the grid replaces; leave them out
+            if leg and not leg.get("estimated"):
+                values[row, col, column] = (leg["duration_min"] * traffic_factor, leg["distance_km"])
+        done += 1
+        if done % 100 == 0:
+            print(f"   {done}/{rows * cols} cells")
+
+    await maps_service.startup()
+    try:
+        await asyncio.gather(*(fill(r, c) for r in range(rows) for c in range(cols)))
+    finally:
+        await maps_service.shutdown()
+
+    values.flush()
+    del values
+    os.replace(array_path + ".tmp", array_path)
+    meta = {
+        "band": band,
+        "hours": list(hours),
+        "cell_deg": cell_deg,
+        **bounds,
+        "hospital_ids": [h["id"] for h in hospitals],
+        "traffic_factor": traffic_factor,
+        "built_at": datetime.utcnow().isoformat(),
+    }
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+    return array_path
+
+
+def _hours(value: str) -> tuple:
+    start, end = (int(v) for v in value.split("-"))
+    if not (0 <= start <= 23 and 0 <= end <= 23):
+        raise argparse.ArgumentTypeError("hours must be within 0-23")
+    return start, end
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a precomputed hospital ETA grid for one time band")
+    parser.add_argument("--band", required=True, help="band name, e.g. morning_peak")
+    parser.add_argument("--hours", type=_hours, default=(0, 23), help="local hours covered, e.g. 7-10 or 22-5")
+    parser.add_argument("--cell-deg", type=float, default=settings.eta_grid_cell_deg)
+    parser.add_argument("--padding-km", type=float, default=5.0, help="margin around the hospitals' bounding box")
+    parser.add_argument("--traffic-factor", type=float, default=1.0, help="multiplier on routed durations")
+    parser.add_argument("--out-dir", default=settings.eta_grid_dir or "eta_grids")
+    parser.add_argument("--concurrency", type=int, default=settings.osrm_max_concurrency)
+    args = parser.parse_args()
+
+    path = asyncio.run(build_grid(
+        args.band, args.hours, args.cell_deg, args.padding_km,
+        args.traffic_factor, args.out_dir, args.concurrency,
+    ))
+    print(f"✅ ETA grid '{args.band}' written to {path}")
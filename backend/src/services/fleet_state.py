@@ -0,0 +1,395 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+
+from src.database.db import AsyncSessionLocal, Emergency
+from src.services.geo import AMBULANCE_SPEED_KMH, MIN_ETA_MINUTES, haversine_km
+from config import get_settings
+
+settings = get_settings()
+
+DRIVERS = ["Ramesh Kumar", "Suresh Yadav", "Anil Sharma", "Vikram Singh", "Manoj Verma"]
+# Placeholder units get their own id namespace so they never alias a real vehicle
+SIMULATED_PREFIX = "SIM-"
+
+
+class FixRing:
+    """
+    Fixed-size columnar ring buffer of GPS fixes for one vehicle:
+    parallel float64 arrays for timestamp (epoch s), lat, lng and speed
+    (km/h). Appends overwrite the oldest fix once full; no per-fix objects.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity)
+        self.lat = np.zeros(capacity)
+        self.lng = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.head = 0    # next write position
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, ts: float, lat: float, lng: float, speed: float):
+        i = self.head
+        self.ts[i], self.lat[i], self.lng[i], self.speed[i] = ts, lat, lng, speed
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def extend(self, ts, lat, lng, speed):
+        """Append many fixes at once (arrays of equal length, oldest first)."""
+        n = len(ts)
+        if n == 0:
+            return
+        if n >= self.capacity:
+            ts, lat, lng, speed = ts[-self.capacity:], lat[-self.capacity:], lng[-self.capacity:], speed[-self.capacity:]
+            n = self.capacity
+        positions = (self.head + np.arange(n)) % self.capacity
+        self.ts[positions], self.lat[positions] = ts, lat
+        self.lng[positions], self.speed[positions] = lng, speed
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    def _order(self) -> np.ndarray:
+        start = (self.head - self.count) % self.capacity
+        return (start + np.arange(self.count)) % self.capacity
+
+    def columns(self, since: float = None) -> Dict[str, np.ndarray]:
+        """Fixes oldest first, optionally only those newer than `since`."""
+        order = self._order()
+        if since is not None:
+            order = order[self.ts[order] > since]
+        return {"ts": self.ts[order], "lat": self.lat[order], "lng": self.lng[order], "speed": self.speed[order]}
+
+    def last(self) -> Optional[tuple]:
+        if not self.count:
+            return None
+        i = (self.head - 1) % self.capacity
+        return self.ts[i], self.lat[i], self.lng[i], self.speed[i]
+
+
+class FleetStateStore:
+    """
+    In-memory fleet state: the latest position of every ambulance, a
+    FixRing of recent fixes, and which ambulance serves which emergency.
+
+    Endpoints read from here instead of the database. An update that moves
+    a unit less than `min_move_m` (and doesn't change its status) is
+    absorbed silently; real changes are pushed to per-emergency subscriber
+    queues (SSE) and to listeners (WebSocket fan-out). Units without a GPS
+    feed are simulated: they drive towards their emergency at ambulance
+    speed, one step per tick. Real units that haven't reported for
+    `fleet_stale_after_s` are evicted on the same tick, unless they are
+    still serving an emergency.
+    """
+
+    def __init__(self):
+        self.units: Dict[str, dict] = {}
+        self.history: Dict[str, FixRing] = {}
+        # emergency id -> {"lat", "lng", "ambulance_id"}; oldest evicted first
+        self.emergencies: "OrderedDict[int, dict]" = OrderedDict()
+        self._by_unit: Dict[str, Set[int]] = {}  # ambulance id -> emergency ids it serves
+        self._simulated: Set[str] = set()
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._listeners: List[tuple] = []  # (wants(emergency_id), listener(emergency_id, message))
+        self._unit_listeners: List[Callable[[str, dict], None]] = []
+        self._ticker: Optional[asyncio.Task] = None
+        self._swept_at = 0.0
+        self.updates = 0
+        self.pushes = 0
+        self.evicted = 0
+
+    # ---------- emergencies ----------
+
+    def track_emergency(self, emergency_id: int, lat: float, lng: float, ambulance_id: str = None) -> dict:
+        """
+        Remember an emergency's location and its ambulance (also used to
+        reassign it). Without an assigned ambulance a SIM-xxxx placeholder
+        stands in; a unit with no known position yet is simulated, starting
+        ~2 km away. Raises ValueError when the emergency has no location.
+        """
+        if lat is None or lng is None:
+            raise ValueError(f"Emergency {emergency_id} has no location to track")
+        ambulance_id = ambulance_id or f"{SIMULATED_PREFIX}{emergency_id:04d}"
+        previous = self.emergencies.get(emergency_id)
+        if previous is not None and previous["ambulance_id"] == ambulance_id:
+            previous.update(lat=lat, lng=lng)
+            return previous
+
+        self._untrack(emergency_id)
+        self.emergencies[emergency_id] = {"lat": lat, "lng": lng, "ambulance_id": ambulance_id}
+        self._by_unit.setdefault(ambulance_id, set()).add(emergency_id)
+        if ambulance_id not in self.units:
+            rng = random.Random(emergency_id)  # stable across polls and restarts
+            self._simulated.add(ambulance_id)
+            self.update(
+                ambulance_id,
+                lat + rng.uniform(-0.02, 0.02),
+                lng + rng.uniform(-0.02, 0.02),
+                simulated=True,
+                driverName=rng.choice(DRIVERS),
+                vehicleNumber=f"DL-{rng.randint(1, 9)}C-{rng.randint(1000, 9999)}",
+            )
+        elif previous is not None:
+            self._publish(emergency_id)  # viewers switch to the new unit
+
+        while len(self.emergencies) > settings.fleet_max_tracked_emergencies:
+            self._untrack(next(iter(self.emergencies)))
+        return self.emergencies[emergency_id]
+
+    def _untrack(self, emergency_id: int):
+        tracked = self.emergencies.pop(emergency_id, None)
+        if tracked is None:
+            return
+        ambulance_id = tracked["ambulance_id"]
+        served = self._by_unit[ambulance_id]
+        served.discard(emergency_id)
+        if not served:
+            del self._by_unit[ambulance_id]
+            if ambulance_id in self._simulated:
+                # A placeholder serving nobody (e.g. replaced by a dispatched unit)
+                self._simulated.discard(ambulance_id)
+                self.units.pop(ambulance_id, None)
+                self.history.pop(ambulance_id, None)
+
+    async def ensure_tracked(self, emergency_id: int) -> Optional[dict]:
+        """
+        Tracking entry for an emergency, reading it from the database only
+        the first time. None when the emergency doesn't exist; ValueError
+        when it has no location (nothing is simulated for it).
+        """
+        tracked = self.emergencies.get(emergency_id)
+        if tracked is not None:
+            return tracked
+        async with AsyncSessionLocal() as db:
+            emergency = await db.get(Emergency, emergency_id)
+        if emergency is None:
+            return None
+        return self.track_emergency(
+            emergency_id, emergency.latitude, emergency.longitude, emergency.assigned_ambulance_id
+        )
+
+    def view(self, emergency_id: int) -> Optional[dict]:
+        """The /ambulance/{emergency_id} response, built from memory."""
+        tracked = self.emergencies.get(emergency_id)
+        unit = self.units.get(tracked["ambulance_id"]) if tracked else None
+        if unit is None:
+            return None
+
+        distance = round(haversine_km(unit["lat"], unit["lng"], tracked["lat"], tracked["lng"]), 1)
+        eta_minutes = max(int(distance / AMBULANCE_SPEED_KMH * 60), MIN_ETA_MINUTES)
+        if distance < 0.5:
+            status = "arriving"
+        elif distance < 2:
+            status = "nearby"
+        else:
+            status = "en_route"
+
+        return {
+            "emergencyId": emergency_id,
+            "ambulanceId": unit["id"],
+            "currentLat": round(unit["lat"], 6),
+            "currentLng": round(unit["lng"], 6),
+            "status": status,
+            "distanceToEmergency": distance,
+            "eta": f"{eta_minutes} minutes",
+            "driverName": unit.get("driverName"),
+            "vehicleNumber": unit.get("vehicleNumber"),
+            "lastUpdated": datetime.utcfromtimestamp(unit["timestamp"]).isoformat(),
+        }
+
+    # ---------- positions ----------
+
+    def update(self, ambulance_id: str, lat: float, lng: float, speed: float = 0.0,
+               timestamp: float = None, simulated: bool = False, **attrs) -> bool:
+        """Record a fix; returns True (and pushes) when the change is visible."""
+        timestamp = timestamp or time.time()
+        self._ring(ambulance_id, simulated).append(timestamp, lat, lng, speed)
+        self.updates += 1
+
+        unit = self.units.get(ambulance_id)
+        if unit is None:
+            unit = self.units[ambulance_id] = {"id": ambulance_id}
+            changed = True
+        else:
+            # Compared with the last pushed position, so slow drift still adds up
+            pushed_lat, pushed_lng = unit["pushed"]
+            moved_m = haversine_km(pushed_lat, pushed_lng, lat, lng) * 1000
+            changed = moved_m >= settings.fleet_min_move_m or any(
+                unit.get(key) != value for key, value in attrs.items()
+            )
+        unit.update(lat=lat, lng=lng, speed=speed, timestamp=timestamp, **attrs)
+        if changed:
+            unit["pushed"] = (lat, lng)
+            for listener in self._unit_listeners:
+                listener(ambulance_id, unit)
+            self._publish_unit(ambulance_id)
+        return changed
+
+    def ingest(self, ambulance_id: str, ts, lat, lng, speed) -> bool:
+        """
+        Absorb a batch of fixes for one vehicle (numpy arrays sorted by time).
+        All go into the ring; only the newest is compared and pushed, and
+        only if it is newer than what the unit already reported.
+        """
+        if ambulance_id.startswith(SIMULATED_PREFIX):
+            raise ValueError(f"'{SIMULATED_PREFIX}' ids are reserved for simulated units")
+        unit = self.units.get(ambulance_id)
+        if unit is not None and not self.is_simulated(ambulance_id) and ts[-1] < unit["timestamp"]:
+            self._ring(ambulance_id, simulated=False).extend(ts, lat, lng, speed)
+            self.updates += len(ts)
+            return False
+        if len(ts) > 1:
+            self._ring(ambulance_id, simulated=False).extend(ts[:-1], lat[:-1], lng[:-1], speed[:-1])
+            self.updates += len(ts) - 1
+        return self.update(ambulance_id, float(lat[-1]), float(lng[-1]), float(speed[-1]), float(ts[-1]))
+
+    def _ring(self, ambulance_id: str, simulated: bool) -> FixRing:
+        if not simulated and ambulance_id in self._simulated:
+            # A real GPS feed takes over; the simulated trail isn't history
+            self._simulated.discard(ambulance_id)
+            self.history.pop(ambulance_id, None)
+        ring = self.history.get(ambulance_id)
+        if ring is None:
+            ring = self.history[ambulance_id] = FixRing(settings.fleet_history_size)
+        return ring
+
+    def is_simulated(self, ambulance_id: str) -> bool:
+        return ambulance_id in self._simulated
+
+    def is_stale(self, ambulance_id: str, now: float = None) -> bool:
+        """True when a real unit's last fix is older than fleet_stale_after_s (or it is unknown)."""
+        unit = self.units.get(ambulance_id)
+        if unit is None:
+            return True
+        if ambulance_id in self._simulated or settings.fleet_stale_after_s <= 0:
+            return False
+        return (now or time.time()) - unit["timestamp"] > settings.fleet_stale_after_s
+
+    def evict_stale(self, now: float = None) -> List[str]:
+        """Drop silent real units that serve no emergency; unit listeners get (id, None)."""
+        now = now or time.time()
+        evicted = [
+            ambulance_id for ambulance_id in self.units
+            if ambulance_id not in self._by_unit and self.is_stale(ambulance_id, now)
+        ]
+        for ambulance_id in evicted:
+            del self.units[ambulance_id]
+            self.history.pop(ambulance_id, None)
+            for listener in self._unit_listeners:
+                listener(ambulance_id, None)
+        self.evicted += len(evicted)
+        return evicted
+
+    def _publish_unit(self, ambulance_id: str):
+        for emergency_id in self._by_unit.get(ambulance_id, ()):
+            self._publish(emergency_id)
+
+    def _publish(self, emergency_id: int):
+        queues = self._subscribers.get(emergency_id, ())
+        listeners = [listener for wants, listener in self._listeners if wants(emergency_id)]
+        if not queues and not listeners:
+            return  # nobody watching: don't even build the message
+        message = self.view(emergency_id)
+        if message is None:
+            return
+        self.pushes += 1
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()  # only the newest position matters
+            queue.put_nowait(message)
+        for listener in listeners:
+            listener(emergency_id, message)
+
+    # ---------- subscriptions ----------
+
+    def subscribe(self, emergency_id: int) -> asyncio.Queue:
+        """Queue receiving each visible position change for an emergency's ambulance."""
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(emergency_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, emergency_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(emergency_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[emergency_id]
+
+    def add_unit_listener(self, listener: Callable[[str, dict], None]):
+        """
+        Call `listener(ambulance_id, unit)` whenever a unit visibly moves or
+        changes, and `listener(ambulance_id, None)` when it is evicted.
+        """
+        self._unit_listeners.append(listener)
+
+    def add_listener(self, listener: Callable[[int, dict], None],
+                     wants: Callable[[int], bool] = lambda emergency_id: True):
+        """Call `listener` on every visible change of emergencies `wants` accepts."""
+        self._listeners.append((wants, listener))
+
+    # ---------- simulation ----------
+
+    def _step_simulated(self, dt: float):
+        step_km = AMBULANCE_SPEED_KMH * dt / 3600
+        targets = {t["ambulance_id"]: t for t in self.emergencies.values()}
+        for ambulance_id in list(self._simulated):
+            unit, target = self.units.get(ambulance_id), targets.get(ambulance_id)
+            if unit is None or target is None:
+                continue
+            remaining_km = haversine_km(unit["lat"], unit["lng"], target["lat"], target["lng"])
+            if remaining_km < 0.05:
+                continue
+            fraction = min(step_km / remaining_km, 1.0)
+            self.update(
+                ambulance_id,
+                unit["lat"] + (target["lat"] - unit["lat"]) * fraction,
+                unit["lng"] + (target["lng"] - unit["lng"]) * fraction,
+                speed=AMBULANCE_SPEED_KMH,
+                simulated=True,
+            )
+
+    async def _tick_forever(self, interval_s: float):
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                self._step_simulated(interval_s)
+                now = time.time()
+                if now - self._swept_at >= min(settings.fleet_stale_after_s / 10, 30):
+                    self._swept_at = now
+                    if settings.fleet_stale_after_s > 0:
+                        self.evict_stale(now)
+            except Exception as e:
+                print(f"❌ Fleet simulation step failed: {e!r}")
+
+    async def start(self):
+        if settings.fleet_simulation_interval_s > 0 and self._ticker is None:
+            self._ticker = asyncio.create_task(
+                self._tick_forever(settings.fleet_simulation_interval_s)
+            )
+
+    async def stop(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            self._ticker = None
+
+    def stats(self) -> dict:
+        return {
+            "units": len(self.units),
+            "simulated": len(self._simulated),
+            "tracked_emergencies": len(self.emergencies),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "updates": self.updates,
+            "pushes": self.pushes,
+            "evicted": self.evicted,
+        }
+
+
+fleet_state = FleetStateStore()
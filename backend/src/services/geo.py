@@ -0,0 +1,98 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+AMBULANCE_SPEED_KMH = 40  # average emergency vehicle speed in Delhi traffic
+MIN_ETA_MINUTES = 5
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometers (unrounded)."""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+
+def coords_of(item: dict) -> tuple:
+    """
+    (lat, lng) of a hospital/ambulance dict in any of the shapes used
+    across the codebase: {"coords": (lat, lng)}, {"latitude", "longitude"}
+    or {"lat", "lng"}.
+    """
+    if "coords" in item:
+        return tuple(item["coords"])
+    if "latitude" in item:
+        return (item["latitude"], item["longitude"])
+    return (item["lat"], item["lng"])
+
+
+def haversine_km_batch(lat: float, lng: float, lats, lngs) -> np.ndarray:
+    """Distances in km from one origin to arrays of points, in one vectorized pass."""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    delta_lat = lat2 - lat1
+    delta_lon = np.radians(np.asarray(lngs, dtype=np.float64) - lng)
+
+    a = np.sin(delta_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(delta_lon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a))
+
+
+def eta_minutes_batch(distances_km, avg_speed_kmh: float = AMBULANCE_SPEED_KMH) -> np.ndarray:
+    """Vectorized counterpart of routes.calculate_eta: whole minutes, floored at MIN_ETA_MINUTES."""
+    minutes = (np.asarray(distances_km, dtype=np.float64) / avg_speed_kmh * 60).astype(np.int64)
+    return np.maximum(minutes, MIN_ETA_MINUTES)
+
+
+def top_k_indices(values, k: int) -> np.ndarray:
+    """
+    Indices of the k smallest values, smallest first.
+    Uses argpartition so only the k winners are sorted, not the full array.
+    """
+    values = np.asarray(values)
+    if k <= 0 or values.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= values.size:
+        return np.argsort(values, kind="stable")
+    part = np.argpartition(values, k - 1)[:k]
+    return part[np.argsort(values[part], kind="stable")]
+
+
+def rank_by_distance(origin: tuple, items: list, k: int):
+    """
+    k nearest dicts to origin by straight-line distance.
+    Returns (items, distances_km, eta_minutes) for the winners, nearest first.
+    """
+    if not items:
+        return [], np.empty(0), np.empty(0, dtype=np.int64)
+
+    coords = np.array([coords_of(item) for item in items], dtype=np.float64)
+    distances = haversine_km_batch(origin[0], origin[1], coords[:, 0], coords[:, 1])
+    winners = top_k_indices(distances, k)
+    return (
+        [items[i] for i in winners],
+        distances[winners],
+        eta_minutes_batch(distances[winners]),
+    )
+
+
+def estimate_travel(origin: tuple, destinations: list, detour_factor: float = 1.0) -> list:
+    """
+    Speed-profile legs for when no router answers in time: straight-line
+    distance scaled by `detour_factor`, at AMBULANCE_SPEED_KMH. Each leg is
+    tagged "estimated" so callers can report it.
+    """
+    if not destinations:
+        return []
+
+    coords = np.array(destinations, dtype=np.float64)
+    distances = haversine_km_batch(origin[0], origin[1], coords[:, 0], coords[:, 1]) * detour_factor
+    etas = eta_minutes_batch(distances)
+    return [
+        {"distance_km": round(float(distance), 2), "duration_min": float(eta), "estimated": True}
+        for distance, eta in zip(distances, etas)
+    ]
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lng: float, precision: int) -> str:
+    """Standard base32 geohash of (lat, lng) with `precision` characters."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def quantize(lat: float, lng: float, grid_deg: float = 0.0, geohash_precision: int = 0) -> str:
+    """
+    Snap a coordinate to a cell id.
+    A geohash precision > 0 wins over the grid; with neither set the
+    coordinate is only rounded to ~1 m.
+    """
+    if geohash_precision > 0:
+        return geohash_encode(lat, lng, geohash_precision)
+    if grid_deg > 0:
+        return f"{int(lat // grid_deg)}:{int(lng // grid_deg)}"
+    return f"{lat:.5f},{lng:.5f}"
+
+
+class GeoCache:
+    """
+    Cache keyed on (origin cell, exact destination) with TTL and LRU eviction.
+
+    Origins are snapped with `quantize` so nearby emergencies share entries;
+    destinations (hospitals) never move, so they are kept exact. If
+    `sqlite_path` is set, entries also go to disk and survive restarts.
+    `start()` loads the persisted entries into the LRU once, in a thread,
+    and from then on `get` never touches sqlite; disk writes become
+    write-behind too: `put` only queues the row and a background task
+    flushes the queue in one transaction, off the event loop. Before that
+    (scripts), misses are looked up on disk and puts are written through.
+    """
+
+    _PURGE_EVERY = 500  # puts between expired/oversize purges of the disk table
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 5000,
+        ttl_s: float = 3600,
+        grid_deg: float = 0.0,
+        geohash_precision: int = 0,
+        sqlite_path: str = "",
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.grid_deg = grid_deg
+        self.geohash_precision = geohash_precision
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_purge = 0
+        self._pending: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (json, expires_at), not on disk yet
+        self._flush_lock = threading.Lock()
+        self._writer: Optional[asyncio.Task] = None
+        self._loaded = False  # persisted entries are in the LRU; no disk reads
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        self._write_db = None
+        if sqlite_path and max_entries > 0:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # Writes get their own connection so a flush never holds up a read (WAL)
+            self._write_db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._write_db.execute(
+                "CREATE TABLE IF NOT EXISTS geo_cache ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            self._purge_disk()
+
+    def make_key(self, origin: tuple, destination: tuple = None, kind: str = "") -> str:
+        cell = quantize(origin[0], origin[1], self.grid_deg, self.geohash_precision)
+        key = f"{kind}|{cell}"
+        if destination is not None:
+            key += f"|{destination[0]:.6f},{destination[1]:.6f}"
+        return key
+
+    def get(self, origin: tuple, destination: tuple = None, kind: str = ""):
+        if self.max_entries <= 0:
+            return None
+
+        key = self.make_key(origin, destination, kind)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            pending = self._pending.get(key)
+            if pending is not None and pending[1] > now:
+                value = json.loads(pending[0])
+                self._remember(key, pending[1], value)
+                self.hits += 1
+                return value
+
+            if self._db is not None and not self._loaded:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM geo_cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                if row and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, origin: tuple, destination: tuple, value, kind: str = ""):
+        if self.max_entries <= 0 or value is None:
+            return
+
+        key = self.make_key(origin, destination, kind)
+        expires_at = time.time() + self.ttl_s
+
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self._db is None:
+                return
+            self._pending[key] = (json.dumps(value), expires_at)
+            self._pending.move_to_end(key)
+
+        if self._writer is None:
+            self.flush()
+
+    def _remember(self, key: str, expires_at: float, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def flush(self):
+        """Write queued entries to disk in one transaction (blocking; run in a thread)."""
+        with self._flush_lock:
+            with self._lock:
+                rows = [
+                    (self.namespace, key, value, expires_at)
+                    for key, (value, expires_at) in self._pending.items()
+                ]
+                self._pending.clear()
+            if not rows or self._write_db is None:
+                return
+            self._write_db.executemany(
+                "INSERT OR REPLACE INTO geo_cache (namespace, key, value, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._write_db.commit()
+
+            self._puts_since_purge += len(rows)
+            if self._puts_since_purge >= self._PURGE_EVERY:
+                self._purge_disk()
+
+    def _purge_disk(self):
+        """Drop expired rows and trim the table to max_entries (oldest first)."""
+        self._write_db.execute(
+            "DELETE FROM geo_cache WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, time.time()),
+        )
+        self._write_db.execute(
+            "DELETE FROM geo_cache WHERE namespace = ? AND key NOT IN ("
+            " SELECT key FROM geo_cache WHERE namespace = ?"
+            " ORDER BY expires_at DESC LIMIT ?)",
+            (self.namespace, self.namespace, self.max_entries),
+        )
+        self._write_db.commit()
+        self._puts_since_purge = 0
+
+    async def _flush_forever(self, interval_s: float):
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"❌ {self.namespace} cache flush failed: {e}")
+
+    def load(self) -> int:
+        """Copy unexpired disk entries into the LRU (blocking; run in a thread)."""
+        rows = self._db.execute(
+            "SELECT key, value, expires_at FROM geo_cache"
+            " WHERE namespace = ? AND expires_at > ?"
+            " ORDER BY expires_at DESC LIMIT ?",
+            (self.namespace, time.time(), self.max_entries),
+        ).fetchall()
+        values = [(key, json.loads(value), expires_at) for key, value, expires_at in rows]
+        with self._lock:
+            # Entries put while this ran are newer than anything on disk; the
+            # rest of the room goes to the freshest rows, inserted oldest first
+            # so those end up most recently used
+            room = max(self.max_entries - len(self._entries), 0)
+            fresh = [row for row in values if row[0] not in self._entries][:room]
+            for key, value, expires_at in reversed(fresh):
+                self._remember(key, expires_at, value)
+            self._loaded = True
+        return len(fresh)
+
+    async def start(self, flush_interval_s: float):
+        """Warm the LRU from disk and switch disk writes to write-behind (FastAPI lifespan)."""
+        if self._db is None:
+            return
+        if not self._loaded:
+            loaded = await asyncio.to_thread(self.load)
+            print(f"✅ {self.namespace} cache: {loaded} entries loaded from disk")
+        if self._writer is None and flush_interval_s > 0:
+            self._writer = asyncio.create_task(self._flush_forever(flush_interval_s))
+
+    async def stop(self):
+        """Stop the writer and flush whatever is still queued."""
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        if self._db is not None:
+            await asyncio.to_thread(self.flush)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "persistent": self._db is not None,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self.flush()
+        with self._flush_lock, self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._write_db.close()
+                self._db = None
+                self._write_db = None
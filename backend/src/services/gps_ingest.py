@@ -0,0 +1,249 @@
+"""
+Ambulance GPS ingestion.
+
+Pings arrive in batches, over HTTP (POST /api/fleet/gps, columnar JSON per
+vehicle) or as UDP datagrams of text lines:
+
+    AMB-0001,1717000000.0,28.6139,77.2090,42.5
+
+Each batch is validated with numpy and appended to the vehicle's FixRing in
+the fleet state; only the newest fix per vehicle touches the latest-position
+map and the push path. A background task periodically down-samples the
+rings (one fix per `gps_persist_resolution_s` per vehicle) and writes them
+to ambulance_tracks in one bulk insert, so the database never sees a row
+per ping. Only windows that have ended are written, each exactly once; a
+fix that arrives after its window was written is not persisted.
+"""
+import asyncio
+import math
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import insert
+
+from src.database.db import SessionLocal, AmbulanceTrack
+from src.services.fleet_state import SIMULATED_PREFIX, fleet_state
+from config import get_settings
+
+settings = get_settings()
+
+
+def clean_fixes(timestamps, lats, lngs, speeds=None):
+    """
+    Arrays of valid fixes sorted by time: rows with out-of-range or
+    non-finite coordinates are dropped. Returns (ts, lat, lng, speed, rejected).
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    lat = np.asarray(lats, dtype=np.float64)
+    lng = np.asarray(lngs, dtype=np.float64)
+    speed = np.zeros(len(ts)) if speeds is None else np.asarray(speeds, dtype=np.float64)
+    if not (len(ts) == len(lat) == len(lng) == len(speed)):
+        raise ValueError("timestamps, lats, lngs and speeds must have the same length")
+
+    valid = (
+        np.isfinite(ts) & np.isfinite(lat) & np.isfinite(lng)
+        & (np.abs(lat) <= 90) & (np.abs(lng) <= 180)
+    )
+    speed = np.where(np.isfinite(speed) & (speed >= 0), speed, 0.0)
+    ts, lat, lng, speed = ts[valid], lat[valid], lng[valid], speed[valid]
+
+    if len(ts) > 1 and np.any(np.diff(ts) < 0):
+        order = np.argsort(ts, kind="stable")
+        ts, lat, lng, speed = ts[order], lat[order], lng[order], speed[order]
+    return ts, lat, lng, speed, int((~valid).sum())
+
+
+def downsample(columns: Dict[str, np.ndarray], resolution_s: float) -> np.ndarray:
+    """Indices of the last fix in each `resolution_s` time bucket (columns sorted by time)."""
+    buckets = np.floor(columns["ts"] / resolution_s)
+    return np.flatnonzero(np.diff(buckets, append=np.inf) != 0)
+
+
+class GpsIngestor:
+    """Batch entry point for pings, UDP listener and down-sampled track writer."""
+
+    def __init__(self, fleet=fleet_state, session_factory=SessionLocal):
+        self.fleet = fleet
+        self.session_factory = session_factory
+        self._persisted_until: Dict[str, float] = {}  # window boundary; earlier windows are written
+        self._writer: Optional[asyncio.Task] = None
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self.accepted = 0
+        self.rejected = 0
+        self.persisted = 0
+        self.failed = 0
+
+    @staticmethod
+    def _clean(ambulance_id: str, timestamps, lats, lngs, speeds=None) -> tuple:
+        if ambulance_id.startswith(SIMULATED_PREFIX):
+            raise ValueError(f"'{SIMULATED_PREFIX}' ids are reserved for simulated units")
+        return clean_fixes(timestamps, lats, lngs, speeds)
+
+    def ingest(self, ambulance_id: str, timestamps, lats, lngs, speeds=None) -> dict:
+        return self._apply(ambulance_id, *self._clean(ambulance_id, timestamps, lats, lngs, speeds))
+
+    def ingest_batch(self, tracks: Dict[str, tuple]) -> Dict[str, dict]:
+        """
+        Several vehicles at once, {ambulance_id: (timestamps, lats, lngs,
+        speeds)}. Every track is validated before any is applied, so a
+        ValueError (prefixed with the offending id) leaves the fleet state
+        untouched and the client can retry the whole batch.
+        """
+        cleaned = {}
+        for ambulance_id, columns in tracks.items():
+            try:
+                cleaned[ambulance_id] = self._clean(ambulance_id, *columns)
+            except ValueError as e:
+                raise ValueError(f"{ambulance_id}: {e}") from None
+        return {ambulance_id: self._apply(ambulance_id, *fixes) for ambulance_id, fixes in cleaned.items()}
+
+    def _apply(self, ambulance_id: str, ts, lat, lng, speed, rejected: int) -> dict:
+        self.rejected += rejected
+        if len(ts):
+            self.fleet.ingest(ambulance_id, ts, lat, lng, speed)
+            self.accepted += len(ts)
+        return {"accepted": len(ts), "rejected": rejected}
+
+    def ingest_lines(self, text: str) -> int:
+        """Text pings, one `id,timestamp,lat,lng[,speed]` per line; returns lines accepted."""
+        by_vehicle: Dict[str, list] = {}
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            fields = line.split(",")
+            if len(fields) not in (4, 5) or not fields[0] or fields[0].startswith(SIMULATED_PREFIX):
+                self.rejected += 1
+                continue
+            try:
+                values = [float(v) for v in fields[1:]]
+            except ValueError:
+                self.rejected += 1
+                continue
+            by_vehicle.setdefault(fields[0], []).append(values if len(values) == 4 else values + [0.0])
+
+        accepted = 0
+        for ambulance_id, rows in by_vehicle.items():
+            columns = np.array(rows).T
+            accepted += self.ingest(ambulance_id, *columns)["accepted"]
+        return accepted
+
+    # ---------- persistence ----------
+
+    def _pending_rows(self, now: float = None) -> list:
+        """
+        Down-sampled rows for every window that ended before `now` (all of
+        them when now is inf) and hasn't been written yet.
+        """
+        rows = []
+        resolution_s = settings.gps_persist_resolution_s
+        now = time.time() if now is None else now
+        # A fix can still land in the current window; leave it open
+        closed_until = math.floor(now / resolution_s) * resolution_s if math.isfinite(now) else math.inf
+        for ambulance_id, ring in list(self.fleet.history.items()):
+            if self.fleet.is_simulated(ambulance_id) or not len(ring):
+                continue
+            since = self._persisted_until.get(ambulance_id, -math.inf)
+
+            columns = ring.columns()
+            window = (columns["ts"] >= since) & (columns["ts"] < closed_until)
+            if not window.any():
+                continue
+            columns = {k: v[window] for k, v in columns.items()}
+            if np.any(np.diff(columns["ts"]) < 0):  # late batches land out of order
+                order = np.argsort(columns["ts"], kind="stable")
+                columns = {k: v[order] for k, v in columns.items()}
+            for i in downsample(columns, resolution_s).tolist():
+                rows.append({
+                    "ambulance_id": ambulance_id,
+                    "recorded_at": datetime.utcfromtimestamp(columns["ts"][i]),
+                    "latitude": float(columns["lat"][i]),
+                    "longitude": float(columns["lng"][i]),
+                    "speed_kmh": float(columns["speed"][i]),
+                })
+            self._persisted_until[ambulance_id] = (
+                closed_until if math.isfinite(closed_until)
+                else (math.floor(columns["ts"][-1] / resolution_s) + 1) * resolution_s
+            )
+        return rows
+
+    def _insert(self, rows):
+        db = self.session_factory()
+        try:
+            db.execute(insert(AmbulanceTrack), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    async def flush(self, final: bool = False):
+        """
+        Persist the windows that ended since the last flush, down-sampled,
+        in one insert; `final` also writes the still-open windows (shutdown).
+        """
+        rows = self._pending_rows(math.inf if final else None)
+        if not rows:
+            return
+        try:
+            await asyncio.to_thread(self._insert, rows)
+            self.persisted += len(rows)
+        except Exception as e:
+            self.failed += len(rows)
+            print(f"❌ GPS track flush failed, {len(rows)} fixes lost: {e}")
+
+    async def _flush_forever(self):
+        while True:
+            await asyncio.sleep(settings.gps_persist_interval_s)
+            await self.flush()
+
+    # ---------- lifecycle ----------
+
+    async def start(self):
+        if self._writer is None and settings.gps_persist_interval_s > 0:
+            self._writer = asyncio.create_task(self._flush_forever())
+        if self._transport is None and settings.gps_udp_port:
+            loop = asyncio.get_running_loop()
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: GpsDatagramProtocol(self),
+                local_addr=(settings.gps_udp_host, settings.gps_udp_port),
+            )
+            print(f"📡 GPS UDP listener on {settings.gps_udp_host}:{settings.gps_udp_port}")
+
+    async def stop(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        await self.flush(final=True)
+
+    def stats(self) -> dict:
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "persisted": self.persisted,
+            "failed": self.failed,
+            "udp": self._transport is not None,
+        }
+
+
+class GpsDatagramProtocol(asyncio.DatagramProtocol):
+    """UDP pings: each datagram holds one or more text lines (see module docstring)."""
+
+    def __init__(self, ingestor: GpsIngestor):
+        self.ingestor = ingestor
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            self.ingestor.ingest_lines(data.decode("ascii", errors="replace"))
+        except Exception as e:
+            print(f"❌ Bad GPS datagram from {addr[0]}: {e!r}")
+
+
+gps_ingestor = GpsIngestor()
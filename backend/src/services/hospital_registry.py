@@ -0,0 +1,221 @@
+import asyncio
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func
+
+from src.database.db import SessionLocal, Hospital, MOCK_HOSPITALS
+from src.services.spatial_index import SpatialIndex
+from config import get_settings
+
+settings = get_settings()
+
+# Capability flags on the Hospital table -> specialist ids used by triage
+# and display names used by the frontend
+CAPABILITIES = {
+    "has_cardiologist": ("cardiologist", "Cardiology"),
+    "has_trauma_center": ("trauma_surgeon", "Trauma"),
+    "has_neurosurgeon": ("neurosurgeon", "Neurosurgery"),
+}
+BASE_SPECIALISTS = ["emergency_physician", "general_physician"]
+
+
+def _flag(value) -> bool:
+    return str(value).lower() == "true"
+
+
+def hospital_record(row: Hospital) -> dict:
+    """Flatten a Hospital row into the dict shape agents and endpoints read."""
+    specialists = list(BASE_SPECIALISTS)
+    specialties = ["Emergency Medicine"]
+    for column, (specialist, specialty) in CAPABILITIES.items():
+        if _flag(getattr(row, column)):
+            specialists.append(specialist)
+            specialties.append(specialty)
+
+    icu_available = row.icu_beds_available or 0
+    general_available = row.general_beds_available or 0
+    if (row.icu_beds_total or 0) > 0:
+        specialties.append("ICU")
+
+    return {
+        "id": row.id,
+        "name": row.name,
+        "address": row.address,
+        "phone": row.phone or row.emergency_contact,
+        "coords": (row.latitude, row.longitude),
+        "lat": row.latitude,
+        "lng": row.longitude,
+        "icu_beds_available": icu_available,
+        "icu_beds_total": row.icu_beds_total or 0,
+        "emergency_beds_available": general_available,
+        "general_beds_total": row.general_beds_total or 0,
+        "bedsAvailable": icu_available + general_available,
+        "specialists": specialists,
+        "specialties": specialties,
+        "last_updated": row.last_updated,
+    }
+
+
+class HospitalRegistry:
+    """
+    In-memory snapshot of the Hospital table, the single hospital source
+    for endpoints and agents.
+
+    The table is loaded once at startup and then refreshed incrementally:
+    only rows whose `last_updated` moved past the watermark are re-read,
+    and deletions are picked up when the row count changes. Every record
+    is also kept in a SpatialIndex, so nearest-hospital queries need no
+    per-request list building.
+    """
+
+    def __init__(self, session_factory=SessionLocal, cell_deg: float = None):
+        self.session_factory = session_factory
+        self.index = SpatialIndex(cell_deg or settings.spatial_index_cell_deg)
+        self._hospitals: Dict[str, dict] = {}
+        self._records: Optional[List[dict]] = None  # cached all() list
+        self._watermark: Optional[datetime] = None
+        self._loaded = False
+        self._refresher: Optional[asyncio.Task] = None
+
+    # ---------- loading ----------
+
+    def _fetch_changes(self):
+        """DB side of a refresh: changed rows, plus all ids if rows were deleted."""
+        db = self.session_factory()
+        try:
+            query = db.query(Hospital)
+            if self._watermark is not None:
+                # >= so rows written within the same timestamp are not missed
+                query = query.filter(Hospital.last_updated >= self._watermark)
+            changed = [hospital_record(row) for row in query.all()]
+
+            all_ids = None
+            count = db.query(func.count(Hospital.id)).scalar()
+            if count < len(self._hospitals) + sum(
+                1 for record in changed if record["id"] not in self._hospitals
+            ):
+                all_ids = {row_id for (row_id,) in db.query(Hospital.id).all()}
+            return changed, all_ids
+        finally:
+            db.close()
+
+    def _apply(self, changed: List[dict], all_ids: Optional[set]) -> int:
+        touched = 0
+        for record in changed:
+            current = self._hospitals.get(record["id"])
+            if current is not None and current["last_updated"] == record["last_updated"]:
+                continue  # re-read at the watermark boundary, unchanged
+            touched += 1
+            self._hospitals[record["id"]] = record
+            lat, lng = record["coords"]
+            self.index.upsert(record["id"], lat, lng, record)
+            if record["last_updated"] and (
+                self._watermark is None or record["last_updated"] > self._watermark
+            ):
+                self._watermark = record["last_updated"]
+
+        removed = 0
+        if all_ids is not None:
+            for hospital_id in [i for i in self._hospitals if i not in all_ids]:
+                del self._hospitals[hospital_id]
+                self.index.remove(hospital_id)
+                removed += 1
+
+        if touched or removed:
+            self._records = None
+        return touched + removed
+
+    def _seed_if_empty(self):
+        """First run on an empty database: insert the bundled Delhi hospitals."""
+        db = self.session_factory()
+        try:
+            if db.query(func.count(Hospital.id)).scalar() == 0:
+                db.add_all(Hospital(**data) for data in MOCK_HOSPITALS if "latitude" in data)
+                db.commit()
+                print(f"🌱 Seeded {len(MOCK_HOSPITALS)} hospitals into empty registry table")
+        finally:
+            db.close()
+
+    def load(self):
+        """Full (re)load of the snapshot."""
+        self._seed_if_empty()
+        self._hospitals.clear()
+        self._records = None
+        self.index = SpatialIndex(self.index.cell_deg)
+        self._watermark = None
+        self._apply(*self._fetch_changes())
+        self._loaded = True
+        print(f"🏥 Hospital registry loaded: {len(self._hospitals)} hospitals")
+
+    def refresh(self) -> int:
+        """Apply rows changed since the last load/refresh; returns records touched."""
+        if not self._loaded:
+            self.load()
+            return len(self._hospitals)
+        return self._apply(*self._fetch_changes())
+
+    async def refresh_async(self) -> int:
+        # Query in a worker thread, mutate the snapshot on the event loop
+        if not self._loaded:
+            await asyncio.to_thread(self.load)
+            return len(self._hospitals)
+        changed, all_ids = await asyncio.to_thread(self._fetch_changes)
+        return self._apply(changed, all_ids)
+
+    async def _refresh_forever(self, interval_s: float):
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                touched = await self.refresh_async()
+                if touched:
+                    print(f"🔄 Hospital registry refreshed ({touched} changes)")
+            except Exception as e:
+                print(f"❌ Hospital registry refresh failed: {e}")
+
+    async def start(self):
+        await self.refresh_async()
+        if settings.hospital_registry_refresh_s > 0 and self._refresher is None:
+            self._refresher = asyncio.create_task(
+                self._refresh_forever(settings.hospital_registry_refresh_s)
+            )
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+    # ---------- queries ----------
+
+    def _ensure_loaded(self):
+        # Scripts that skip the app lifespan load lazily on first use
+        if not self._loaded:
+            self.load()
+
+    def all(self) -> List[dict]:
+        """All records; the list is shared between callers, so treat it as read-only."""
+        self._ensure_loaded()
+        if self._records is None:
+            self._records = list(self._hospitals.values())
+        return self._records
+
+    def get(self, hospital_id: str) -> Optional[dict]:
+        self._ensure_loaded()
+        return self._hospitals.get(hospital_id)
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 1,
+        max_radius_km: float = None,
+        predicate: Callable[[dict], bool] = None,
+    ):
+        self._ensure_loaded()
+        return self.index.nearest(lat, lng, k=k, max_radius_km=max_radius_km, predicate=predicate)
+
+    def __len__(self) -> int:
+        return len(self._hospitals)
+
+
+hospital_registry = HospitalRegistry()
@@ -1,51 +1,342 @@
+import asyncio
+import importlib.util
+import time
 import httpx
 from config import get_settings
+from src.services.geo_cache import GeoCache
+from src.services.geo import estimate_travel
+from src.services.metrics import UPSTREAM_LATENCY
+from src.services.routing_backends import build_backends
 
 settings = get_settings()
 
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 class MapsService:
     def __init__(self):
         self.base_url = settings.osrm_server
+        self.secondary_url = settings.osrm_secondary_server
+        self._client = None
+        self.osrm_timeout = httpx.Timeout(
+            settings.osrm_read_timeout_s, connect=settings.osrm_connect_timeout_s
+        )
+        self.nominatim_timeout = httpx.Timeout(settings.nominatim_timeout_s)
+        self.route_cache = GeoCache(
+            namespace="route",
+            max_entries=settings.route_cache_max_entries,
+            ttl_s=settings.route_cache_ttl_s,
+            grid_deg=settings.route_cache_grid_deg,
+            geohash_precision=settings.route_cache_geohash_precision,
+            sqlite_path=settings.route_cache_sqlite_path,
+        )
+        self.geocode_cache = GeoCache(
+            namespace="geocode",
+            max_entries=settings.geocode_cache_max_entries,
+            ttl_s=settings.geocode_cache_ttl_s,
+            grid_deg=settings.geocode_cache_grid_deg,
+            sqlite_path=settings.route_cache_sqlite_path,
+        )
+        # OSRM first, then the offline road graph if one is configured
+        self.backends = build_backends(
+            settings.routing_backends,
+            self,
+            graph_path=settings.road_graph_path,
+            max_snap_km=settings.road_graph_max_snap_km,
+            breaker_failures=settings.routing_breaker_failures,
+            breaker_cooldown_s=settings.routing_breaker_cooldown_s,
+        )
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_s,
+            ),
+            http2=settings.http2_enabled and HTTP2_AVAILABLE,
+            headers={"User-Agent": "GoldenHourResponse/1.0"},
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled client; created lazily for scripts that skip the app lifespan."""
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    async def startup(self):
+        """
+        Open the shared connection pool, start the cache writers and load
+        the local road graph (FastAPI lifespan).
+        """
+        self.client
+        await self.route_cache.start(settings.route_cache_flush_interval_s)
+        await self.geocode_cache.start(settings.route_cache_flush_interval_s)
+        for backend in self.backends:
+            await asyncio.to_thread(backend.load)
+
+    async def _route_via_backends(self, start_coords: tuple, end_coords: tuple):
+        for backend in self.backends:
+            if backend.available:
+                route = await backend.route(start_coords, end_coords)
+                if route:
+                    return route, backend
+        return None, None
+
+    async def _table_via_backends(self, origin: tuple, destinations: list):
+        for backend in self.backends:
+            if backend.available:
+                travel = await backend.table(origin, destinations)
+                if travel:
+                    return travel, backend
+        return None, None
+
+    async def shutdown(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        await self.route_cache.stop()
+        await self.geocode_cache.stop()
+        self.route_cache.close()
+        self.geocode_cache.close()
+
+    async def _get(self, service: str, operation: str, url: str, **kwargs) -> httpx.Response:
+        """GET on the shared client, timed into the upstream latency histogram."""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self.client.get(url, **kwargs)
+            outcome = "ok" if response.status_code == 200 else "http_error"
+            return response
+        except asyncio.CancelledError:
+            outcome = "cancelled"  # lost a hedge race or hit a stage deadline
+            raise
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            raise
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, service, operation, outcome)
+
+    async def _hedged(self, request):
+        """
+        Run `request(base_url)` against the primary OSRM server. If nothing
+        useful comes back within osrm_hedge_after_s (or the primary fails
+        early), also send it to the secondary server. The first non-empty
+        result wins; None once osrm_route_timeout_s has passed.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + settings.osrm_route_timeout_s
+        hedge_at = started + settings.osrm_hedge_after_s
+        can_hedge = bool(self.secondary_url)
+
+        pending = {asyncio.create_task(request(self.base_url))}
+        try:
+            while True:
+                now = loop.time()
+                if now >= deadline:
+                    return None
+                if can_hedge and (now >= hedge_at or not pending):
+                    pending.add(asyncio.create_task(request(self.secondary_url)))
+                    can_hedge = False
+                    continue
+                if not pending:
+                    return None
+
+                wake_at = hedge_at if can_hedge else deadline
+                done, pending = await asyncio.wait(
+                    pending, timeout=wake_at - now, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.result():
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
 
     async def get_route_details(self, start_coords: tuple, end_coords: tuple):
         """
-        Get route data from OSRM.
+        Get route data from the routing backends (OSRM, then the local road
+        graph), served from the route cache when the origin cell / hospital
+        pair was routed recently.
+        In latency-bounded mode a late or failed route becomes a speed-profile
+        estimate ("estimated": True, no geometry) instead of None.
         Args: start_coords (lat, lon), end_coords (lat, lon)
         """
+        route = self.route_cache.get(start_coords, end_coords, kind="route")
+        if route is not None:
+            return route
+
+        route, backend = await self._route_via_backends(start_coords, end_coords)
+        if route and backend.cacheable:
+            self.route_cache.put(start_coords, end_coords, route, kind="route")
+            self.route_cache.put(
+                start_coords,
+                end_coords,
+                {"distance_km": route["distance_km"], "duration_min": route["duration_min"]},
+                kind="leg",
+            )
+        elif not route and settings.osrm_latency_bounded:
+            route = {
+                **estimate_travel(start_coords, [end_coords], settings.estimate_detour_factor)[0],
+                "geometry": None,
+            }
+        return route
+
+    async def _fetch_route(self, start_coords: tuple, end_coords: tuple, base_url: str):
         # OSRM expects: longitude,latitude
         start_str = f"{start_coords[1]},{start_coords[0]}"
         end_str = f"{end_coords[1]},{end_coords[0]}"
         
-        url = f"{self.base_url}/route/v1/driving/{start_str};{end_str}"
+        url = f"{base_url}/route/v1/driving/{start_str};{end_str}"
         params = {"overview": "full", "geometries": "geojson"}
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("code") == "Ok" and data.get("routes"):
-                        route = data["routes"][0]
-                        return {
-                            "distance_km": round(route["distance"] / 1000, 2),
-                            "duration_min": round(route["duration"] / 60, 0),
-                            "geometry": route["geometry"]
-                        }
+            response = await self._get("osrm", "route", url, params=params, timeout=self.osrm_timeout)
+            if response.status_code == 200:
+                data = response.json()
+                if data.get("code") == "Ok" and data.get("routes"):
+                    route = data["routes"][0]
+                    return {
+                        "distance_km": round(route["distance"] / 1000, 2),
+                        "duration_min": round(route["duration"] / 60, 0),
+                        "geometry": route["geometry"]
+                    }
         except Exception as e:
             print(f"Error fetching route: {e}")
         return None
 
+    async def iter_routes(self, start_coords: tuple, destinations: list):
+        """
+        Fetch routes from one origin to many destinations concurrently.
+        Yields (index, route_info) in completion order, so callers can start
+        ranking before the slowest route arrives. Destinations that fail or
+        exceed settings.osrm_route_timeout_s are skipped (in latency-bounded
+        mode they come back as estimates instead).
+        """
+        semaphore = asyncio.Semaphore(settings.osrm_max_concurrency)
+        # Bounded mode already answers within the deadline (real or estimated)
+        timeout = None if settings.osrm_latency_bounded else settings.osrm_route_timeout_s
+
+        async def fetch(index: int, end_coords: tuple):
+            async with semaphore:
+                try:
+                    route = await asyncio.wait_for(
+                        self.get_route_details(start_coords, end_coords),
+                        timeout=timeout,
+                    )
+                except asyncio.TimeoutError:
+                    print(f"Route to {end_coords} timed out after {settings.osrm_route_timeout_s}s")
+                    route = None
+            return index, route
+
+        tasks = [
+            asyncio.create_task(fetch(index, end_coords))
+            for index, end_coords in enumerate(destinations)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, route = await next_done
+                if route:
+                    yield index, route
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_travel_matrix(self, origin: tuple, destinations: list):
+        """
+        Get distance/duration from one origin to many destinations with a
+        single table request (no geometry): OSRM /table, hedged like routes,
+        then a one-to-many search on the local road graph.
+        Returns a list aligned with destinations: {"distance_km", "duration_min"}
+        per reachable destination, None otherwise. If no table answer arrives
+        in time, latency-bounded mode fills the gaps with estimated legs;
+        otherwise it falls back to concurrent per-route requests.
+        """
+        travel = [
+            self.route_cache.get(origin, destination, kind="leg")
+            for destination in destinations
+        ]
+        missing = [index for index, leg in enumerate(travel) if leg is None]
+        if not missing:
+            return travel
+
+        missing_destinations = [destinations[index] for index in missing]
+        fetched, backend = await self._table_via_backends(origin, missing_destinations)
+
+        if fetched:
+            for index, leg in zip(missing, fetched):
+                travel[index] = leg
+                if backend.cacheable:
+                    self.route_cache.put(origin, destinations[index], leg, kind="leg")
+        elif settings.osrm_latency_bounded:
+            estimates = estimate_travel(
+                origin, missing_destinations, settings.estimate_detour_factor
+            )
+            for index, leg in zip(missing, estimates):
+                travel[index] = leg
+        else:
+            async for position, route in self.iter_routes(origin, missing_destinations):
+                travel[missing[position]] = {
+                    "distance_km": route["distance_km"],
+                    "duration_min": route["duration_min"],
+                }
+        return travel
+
+    async def _fetch_travel_matrix(self, origin: tuple, destinations: list, base_url: str):
+        # OSRM expects: longitude,latitude; index 0 is the origin
+        coords = ";".join(
+            f"{lng},{lat}" for lat, lng in [origin, *destinations]
+        )
+        url = f"{base_url}/table/v1/driving/{coords}"
+        params = {
+            "sources": "0",
+            "destinations": ";".join(str(i) for i in range(1, len(destinations) + 1)),
+            "annotations": "duration,distance",
+        }
+
+        try:
+            response = await self._get("osrm", "table", url, params=params, timeout=self.osrm_timeout)
+            if response.status_code == 200:
+                data = response.json()
+                if data.get("code") == "Ok" and data.get("durations"):
+                    durations = data["durations"][0]
+                    distances = data["distances"][0]
+                    return [
+                        {
+                            "distance_km": round(distance / 1000, 2),
+                            "duration_min": round(duration / 60, 0),
+                        }
+                        if duration is not None and distance is not None
+                        else None
+                        for duration, distance in zip(durations, distances)
+                    ]
+        except Exception as e:
+            print(f"Error fetching travel matrix: {e!r}")
+        return None
+
     async def get_location_address(self, lat: float, lng: float):
-        """Reverse geocoding using Nominatim"""
+        """Reverse geocoding using Nominatim, cached per ~50 m cell"""
+        address = self.geocode_cache.get((lat, lng))
+        if address is not None:
+            return address
+
+        address = await self._fetch_location_address(lat, lng)
+        if address != "Unknown Location":
+            self.geocode_cache.put((lat, lng), None, address)
+        return address
+
+    async def _fetch_location_address(self, lat: float, lng: float):
         url = "https://nominatim.openstreetmap.org/reverse"
         params = {"lat": lat, "lon": lng, "format": "json", "zoom": 18, "addressdetails": 1}
-        headers = {"User-Agent": "GoldenHourResponse/1.0"}
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, headers=headers)
-                if response.status_code == 200:
-                    return response.json().get("display_name", "Unknown Location")
+            response = await self._get(
+                "nominatim", "reverse", url, params=params, timeout=self.nominatim_timeout
+            )
+            if response.status_code == 200:
+                return response.json().get("display_name", "Unknown Location")
         except Exception as e:
             print(f"Error resolving address: {e}")
         return "Unknown Location"
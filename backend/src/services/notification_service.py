@@ -1,6 +1,8 @@
+import time
 from aiosmtplib import send
 from email.message import EmailMessage
 from config import get_settings
+from src.services.metrics import UPSTREAM_LATENCY
 
 settings = get_settings()
 
@@ -12,6 +14,8 @@ class NotificationService:
         message["Subject"] = subject
         message.set_content(body)
 
+        started = time.perf_counter()
+        outcome = "error"
         try:
             await send(
                 message,
@@ -21,9 +25,12 @@ class NotificationService:
                 password=settings.smtp_password,
                 start_tls=True
             )
+            outcome = "ok"
             return True
         except Exception as e:
             print(f"Failed to send email: {e}")
             return False
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, "smtp", "send", outcome)
 
 notification_service = NotificationService()
@@ -0,0 +1,265 @@
+"""
+In-process road network for routing without an OSRM server.
+
+The graph is built from an OSM-derived edges file (CSV, one road segment
+per row) into compressed sparse row arrays, and can be compiled to a .npz
+that loads in milliseconds:
+
+    python -m src.services.road_graph edges.csv delhi_roads.npz
+
+CSV columns: from_lat, from_lng, to_lat, to_lng, and optionally length_m
+(haversine when blank), speed_kmh (default 30) and oneway (default 0).
+Segment endpoints with the same coordinates (6 decimals) are one node.
+"""
+import csv
+import math
+import sys
+from heapq import heappop, heappush
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.services.geo import haversine_km, AMBULANCE_SPEED_KMH
+from src.services.spatial_index import SpatialIndex
+
+DEFAULT_SPEED_KMH = 30.0
+NODE_CELL_DEG = 0.005  # ~500 m snapping buckets
+
+
+class RoadGraph:
+    """
+    Directed road graph in CSR form: the out-edges of node u are
+    indices[indptr[u]:indptr[u + 1]], with travel time in `seconds` and
+    length in `meters`. Searches read the arrays through memoryviews,
+    which index as fast as Python lists without copying them.
+    """
+
+    def __init__(self, lats, lngs, indptr, indices, seconds, meters, max_snap_km: float = 2.0):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.seconds = np.asarray(seconds, dtype=np.float32)
+        self.meters = np.asarray(meters, dtype=np.float32)
+        self.max_snap_km = max_snap_km
+
+        # Fastest edge bounds the A* heuristic (time can't beat straight line at this speed)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speeds = np.where(self.seconds > 0, self.meters / self.seconds, 0.0)
+        self.max_speed_mps = float(speeds.max()) if len(speeds) else 1.0
+
+        self._nodes = SpatialIndex(NODE_CELL_DEG)
+        for node, (lat, lng) in enumerate(zip(self.lats.tolist(), self.lngs.tolist())):
+            self._nodes.upsert(node, lat, lng, {"node": node})
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    # ---------- building / loading ----------
+
+    @classmethod
+    def from_edges(cls, from_coords, to_coords, length_m=None, speed_kmh=None, oneway=None,
+                   **kwargs) -> "RoadGraph":
+        from_coords = np.asarray(from_coords, dtype=np.float64).reshape(-1, 2)
+        to_coords = np.asarray(to_coords, dtype=np.float64).reshape(-1, 2)
+        n = len(from_coords)
+
+        if length_m is None:
+            length_m = np.full(n, np.nan)
+        length_m = np.asarray(length_m, dtype=np.float64)
+        missing = np.isnan(length_m)
+        if missing.any():
+            lat1, lng1 = np.radians(from_coords[missing].T)
+            lat2, lng2 = np.radians(to_coords[missing].T)
+            a = (np.sin((lat2 - lat1) / 2) ** 2
+                 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+            length_m[missing] = 2 * 6371000.0 * np.arcsin(np.sqrt(a))
+
+        speed_kmh = np.full(n, DEFAULT_SPEED_KMH) if speed_kmh is None else np.asarray(speed_kmh, dtype=np.float64)
+        speed_kmh = np.where(speed_kmh > 0, speed_kmh, DEFAULT_SPEED_KMH)
+        oneway = np.zeros(n, dtype=bool) if oneway is None else np.asarray(oneway, dtype=bool)
+
+        # Nodes = unique endpoint coordinates
+        endpoints = np.round(np.vstack([from_coords, to_coords]), 6)
+        nodes, inverse = np.unique(endpoints, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        u, v = inverse[:n], inverse[n:]
+        seconds = length_m / (speed_kmh / 3.6)
+
+        # Two-way segments contribute the reverse edge as well
+        both = ~oneway
+        src = np.concatenate([u, v[both]])
+        dst = np.concatenate([v, u[both]])
+        sec = np.concatenate([seconds, seconds[both]])
+        met = np.concatenate([length_m, length_m[both]])
+
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(nodes)), out=indptr[1:])
+        return cls(nodes[:, 0], nodes[:, 1], indptr, dst[order], sec[order], met[order], **kwargs)
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> "RoadGraph":
+        def number(value, default=np.nan):
+            return float(value) if value not in (None, "") else default
+
+        from_coords, to_coords, lengths, speeds, oneway = [], [], [], [], []
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                from_coords.append((float(row["from_lat"]), float(row["from_lng"])))
+                to_coords.append((float(row["to_lat"]), float(row["to_lng"])))
+                lengths.append(number(row.get("length_m")))
+                speeds.append(number(row.get("speed_kmh"), DEFAULT_SPEED_KMH))
+                oneway.append(str(row.get("oneway") or "0").lower() in ("1", "true", "yes"))
+        return cls.from_edges(from_coords, to_coords, lengths, speeds, oneway, **kwargs)
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path, lats=self.lats, lngs=self.lngs, indptr=self.indptr,
+            indices=self.indices, seconds=self.seconds, meters=self.meters,
+        )
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "RoadGraph":
+        """Load a compiled .npz graph, or build one from an edges .csv."""
+        if path.endswith(".csv"):
+            return cls.from_csv(path, **kwargs)
+        with np.load(path) as data:
+            return cls(
+                data["lats"], data["lngs"], data["indptr"], data["indices"],
+                data["seconds"], data["meters"], **kwargs,
+            )
+
+    # ---------- queries ----------
+
+    def snap(self, lat: float, lng: float) -> Optional[Tuple[int, float]]:
+        """Nearest node and its straight-line distance in km, None if beyond max_snap_km."""
+        found = self._nodes.nearest(lat, lng, k=1, max_radius_km=self.max_snap_km)
+        if not found:
+            return None
+        distance_km, payload = found[0]
+        return payload["node"], distance_km
+
+    def _search(self, source: int, goal: int = None, targets: set = None, max_seconds: float = None):
+        """
+        Shortest travel time from `source`. With `goal`, A* towards that node
+        (haversine / fastest speed is admissible); with `targets`, Dijkstra
+        that stops once every target is settled.
+        Returns (seconds, meters, previous-node) dicts for settled nodes.
+        """
+        indptr = memoryview(self.indptr)
+        indices = memoryview(self.indices)
+        seconds = memoryview(self.seconds)
+        meters = memoryview(self.meters)
+        lats, lngs = memoryview(self.lats), memoryview(self.lngs)
+
+        if goal is not None:
+            goal_lat, goal_lng = lats[goal], lngs[goal]
+            inverse_speed = 1000.0 / self.max_speed_mps
+
+            def heuristic(node: int) -> float:
+                return haversine_km(lats[node], lngs[node], goal_lat, goal_lng) * inverse_speed
+        else:
+            def heuristic(node: int) -> float:
+                return 0.0
+
+        best: Dict[int, float] = {source: 0.0}
+        length: Dict[int, float] = {source: 0.0}
+        previous: Dict[int, int] = {source: -1}
+        settled = set()
+        remaining = set(targets) if targets else None
+        heap = [(heuristic(source), 0.0, source)]
+
+        while heap:
+            _, time_s, node = heappop(heap)
+            if node in settled:
+                continue
+            if max_seconds is not None and time_s > max_seconds:
+                break
+            settled.add(node)
+            if node == goal:
+                break
+            if remaining is not None:
+                remaining.discard(node)
+                if not remaining:
+                    break
+
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = indices[edge]
+                candidate = time_s + seconds[edge]
+                if candidate < best.get(neighbour, math.inf):
+                    best[neighbour] = candidate
+                    length[neighbour] = length[node] + meters[edge]
+                    previous[neighbour] = node
+                    heappush(heap, (candidate + heuristic(neighbour), candidate, neighbour))
+
+        return ({n: best[n] for n in settled}, {n: length[n] for n in settled}, previous)
+
+    @staticmethod
+    def _access(snap_km: float) -> Tuple[float, float]:
+        # Off-network stretch to the snapped node: straight line at ambulance speed
+        return snap_km * 1000, snap_km / AMBULANCE_SPEED_KMH * 3600
+
+    def route(self, start: tuple, end: tuple) -> Optional[dict]:
+        """Fastest route as {"distance_km", "duration_min", "geometry"} (GeoJSON, OSRM-shaped)."""
+        start_snap, end_snap = self.snap(*start), self.snap(*end)
+        if start_snap is None or end_snap is None:
+            return None
+        source, goal = start_snap[0], end_snap[0]
+
+        times, lengths, previous = self._search(source, goal=goal)
+        if goal not in times:
+            return None
+
+        path = [goal]
+        while path[-1] != source:
+            path.append(previous[path[-1]])
+        path.reverse()
+
+        start_m, start_s = self._access(start_snap[1])
+        end_m, end_s = self._access(end_snap[1])
+        coordinates = [[start[1], start[0]]]
+        coordinates += [[float(self.lngs[n]), float(self.lats[n])] for n in path]
+        coordinates.append([end[1], end[0]])
+        return {
+            "distance_km": round((lengths[goal] + start_m + end_m) / 1000, 2),
+            "duration_min": round((times[goal] + start_s + end_s) / 60, 0),
+            "geometry": {"type": "LineString", "coordinates": coordinates},
+        }
+
+    def table(self, origin: tuple, destinations: List[tuple]) -> Optional[list]:
+        """One-to-many travel (one Dijkstra), aligned with destinations; None per unreachable."""
+        origin_snap = self.snap(*origin)
+        if origin_snap is None:
+            return None
+        destination_snaps = [self.snap(*destination) for destination in destinations]
+        targets = {snap[0] for snap in destination_snaps if snap is not None}
+        if not targets:
+            # Nothing to stop at: an unbounded search would settle the whole graph
+            return [None] * len(destinations)
+        times, lengths, _ = self._search(origin_snap[0], targets=targets)
+
+        origin_m, origin_s = self._access(origin_snap[1])
+        legs = []
+        for snap in destination_snaps:
+            if snap is None or snap[0] not in times:
+                legs.append(None)
+                continue
+            access_m, access_s = self._access(snap[1])
+            legs.append({
+                "distance_km": round((lengths[snap[0]] + origin_m + access_m) / 1000, 2),
+                "duration_min": round((times[snap[0]] + origin_s + access_s) / 60, 0),
+            })
+        return legs
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m src.services.road_graph EDGES.csv OUT.npz")
+    graph = RoadGraph.from_csv(sys.argv[1])
+    graph.save(sys.argv[2])
+    print(f"🛣️  Compiled {len(graph)} nodes / {graph.edge_count} edges into {sys.argv[2]}")
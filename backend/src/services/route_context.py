@@ -0,0 +1,93 @@
+import asyncio
+
+from src.services.maps_service import maps_service
+
+
+class RouteContext:
+    """
+    Request-scoped route memo for one emergency.
+
+    Exposes the same get_route_details / get_travel_matrix interface as
+    MapsService, so agents can take either. Every origin/destination pair is
+    requested from MapsService at most once per emergency, including while a
+    request is still in flight: later callers await the same future.
+    A full route also answers later travel-matrix lookups for that pair.
+    """
+
+    def __init__(self, maps=maps_service):
+        self.maps = maps
+        self._legs = {}    # (origin, destination) -> Future[leg | None]
+        self._routes = {}  # (origin, destination) -> Future[route | None]
+        self.upstream_pairs = 0
+        self.reused_pairs = 0
+
+    @staticmethod
+    def _key(origin, destination) -> tuple:
+        return (tuple(origin), tuple(destination))
+
+    async def get_route_details(self, start_coords: tuple, end_coords: tuple):
+        key = self._key(start_coords, end_coords)
+        future = self._routes.get(key)
+        if future is not None:
+            self.reused_pairs += 1
+            return await future
+
+        future = asyncio.get_running_loop().create_future()
+        self._routes[key] = future
+        self.upstream_pairs += 1
+        try:
+            route = await self.maps.get_route_details(start_coords, end_coords)
+        except BaseException:
+            del self._routes[key]
+            future.set_result(None)
+            raise
+
+        future.set_result(route)
+        if route and key not in self._legs:
+            leg = asyncio.get_running_loop().create_future()
+            leg.set_result(
+                {k: v for k, v in route.items() if k != "geometry"}
+            )
+            self._legs[key] = leg
+        return route
+
+    async def get_travel_matrix(self, origin: tuple, destinations: list):
+        keys = [self._key(origin, destination) for destination in destinations]
+
+        missing = [key for key in dict.fromkeys(keys) if key not in self._legs]
+        self.reused_pairs += len(keys) - len(missing)
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in missing}
+            self._legs.update(futures)
+            self.upstream_pairs += len(missing)
+            try:
+                fetched = await self.maps.get_travel_matrix(
+                    origin, [key[1] for key in missing]
+                )
+            except BaseException:
+                for key, future in futures.items():
+                    del self._legs[key]
+                    future.set_result(None)
+                raise
+            for key, leg in zip(missing, fetched):
+                futures[key].set_result(leg)
+
+        return [await self._legs[key] for key in keys]
+
+    def prime_legs(self, origin: tuple, destinations: list, legs: list):
+        """Seed known legs (e.g. from the ETA grid) so later lookups skip upstream."""
+        loop = asyncio.get_running_loop()
+        for destination, leg in zip(destinations, legs):
+            key = self._key(origin, destination)
+            if leg and key not in self._legs:
+                future = loop.create_future()
+                future.set_result(leg)
+                self._legs[key] = future
+
+    def stats(self) -> dict:
+        return {
+            "upstream_pairs": self.upstream_pairs,
+            "reused_pairs": self.reused_pairs,
+        }
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from src.services.road_graph import RoadGraph
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker. After `failures` failed calls in a row it
+    opens for `cooldown_s`; then a single probe call is let through, which
+    closes it on success or reopens it on failure.
+    """
+
+    def __init__(self, failures: int = 3, cooldown_s: float = 30.0):
+        self.failures = failures
+        self.cooldown_s = cooldown_s
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown_s else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half-open" and not self.probing)
+
+    def record(self, ok: bool):
+        if ok:
+            self.consecutive = 0
+            self.opened_at = None
+            return
+        self.consecutive += 1
+        if self.opened_at is not None or self.consecutive >= self.failures:
+            if self.opened_at is None:
+                self.trips += 1
+                print(f"⚠️  Routing upstream failing, skipping it for {self.cooldown_s:g}s")
+            self.opened_at = time.monotonic()
+
+
+class RoutingBackend(ABC):
+    """
+    Source of road travel for MapsService. `route` returns
+    {"distance_km", "duration_min", "geometry"} or None; `table` returns a
+    list aligned with destinations ({"distance_km", "duration_min"} or None
+    per destination), or None when the backend could not answer at all.
+    Backends that report `available = False` are skipped.
+    """
+
+    name = "base"
+    cacheable = True  # results may go into the route cache
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def load(self):
+        """Prepare local resources (called once at startup, in a worker thread)."""
+
+    def stats(self) -> dict:
+        return {"available": self.available}
+
+    @abstractmethod
+    async def route(self, start: tuple, end: tuple) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def table(self, origin: tuple, destinations: List[tuple]) -> Optional[list]:
+        ...
+
+
+class OsrmBackend(RoutingBackend):
+    """
+    Remote OSRM through MapsService's pooled client, hedged across servers.
+    A circuit breaker takes it out of the chain while it keeps timing out
+    or failing, so requests go straight to the next backend instead of
+    each waiting out osrm_route_timeout_s first.
+    """
+
+    name = "osrm"
+
+    def __init__(self, maps, breaker: CircuitBreaker = None):
+        self.maps = maps
+        self.breaker = breaker or CircuitBreaker()
+
+    @property
+    def available(self) -> bool:
+        return self.breaker.allow()
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available,
+            "breaker": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive,
+            "trips": self.breaker.trips,
+        }
+
+    async def _call(self, request):
+        probe = self.breaker.state == "half-open"
+        if probe:
+            self.breaker.probing = True
+        try:
+            # A call cut off by a stage deadline (CancelledError) isn't recorded either way
+            result = await self.maps._hedged(request)
+        finally:
+            if probe:
+                self.breaker.probing = False
+        self.breaker.record(result is not None)
+        return result
+
+    async def route(self, start: tuple, end: tuple) -> Optional[dict]:
+        return await self._call(
+            lambda base_url: self.maps._fetch_route(start, end, base_url)
+        )
+
+    async def table(self, origin: tuple, destinations: List[tuple]) -> Optional[list]:
+        return await self._call(
+            lambda base_url: self.maps._fetch_travel_matrix(origin, destinations, base_url)
+        )
+
+
+class LocalGraphBackend(RoutingBackend):
+    """
+    In-process RoadGraph (A* for routes, one Dijkstra per table). The graph
+    is loaded on first use or at startup; without a graph file it reports
+    unavailable and is skipped.
+    """
+
+    name = "local"
+    cacheable = False  # answers in ms; don't let it shadow OSRM in the cache
+
+    def __init__(self, graph_path: str = "", max_snap_km: float = 2.0):
+        self.graph_path = graph_path
+        self.max_snap_km = max_snap_km
+        self.graph: Optional[RoadGraph] = None
+
+    @property
+    def available(self) -> bool:
+        return bool(self.graph_path) or self.graph is not None
+
+    def load(self) -> Optional[RoadGraph]:
+        if self.graph is None and self.graph_path:
+            try:
+                self.graph = RoadGraph.load(self.graph_path, max_snap_km=self.max_snap_km)
+                print(f"🛣️  Road graph loaded: {len(self.graph)} nodes / {self.graph.edge_count} edges")
+            except Exception as e:
+                print(f"❌ Road graph {self.graph_path} failed to load, local routing disabled: {e}")
+                self.graph_path = ""
+        return self.graph
+
+    async def route(self, start: tuple, end: tuple) -> Optional[dict]:
+        graph = self.load()
+        # Searches are CPU-bound; a worker thread keeps long ones off the loop
+        return await asyncio.to_thread(graph.route, start, end) if graph else None
+
+    async def table(self, origin: tuple, destinations: List[tuple]) -> Optional[list]:
+        graph = self.load()
+        return await asyncio.to_thread(graph.table, origin, destinations) if graph else None
+
+
+def build_backends(names: str, maps, graph_path: str = "", max_snap_km: float = 2.0,
+                   breaker_failures: int = 3, breaker_cooldown_s: float = 30.0) -> List[RoutingBackend]:
+    """Backend chain from a comma list like "osrm,local" (tried in order)."""
+    factories = {
+        "osrm": lambda: OsrmBackend(maps, CircuitBreaker(breaker_failures, breaker_cooldown_s)),
+        "local": lambda: LocalGraphBackend(graph_path, max_snap_km),
+    }
+    backends = []
+    for name in (n.strip() for n in names.split(",")):
+        if not name:
+            continue
+        if name not in factories:
+            raise ValueError(f"Unknown routing backend '{name}', expected one of {list(factories)}")
+        backends.append(factories[name]())
+    return backends
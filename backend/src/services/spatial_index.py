@@ -0,0 +1,167 @@
+import math
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from src.services.geo import coords_of, haversine_km
+
+KM_PER_DEG_LAT = 111.32
+
+
+class SpatialIndex:
+    """
+    Uniform lat/lng grid over point items (hospitals, ambulances).
+
+    Items live in buckets of `cell_deg` degrees. Queries walk rings of cells
+    outward from the query point and stop as soon as no unvisited cell can
+    hold a closer match, so cost depends on local density rather than on
+    the registry size. Items are added, moved and removed one at a time,
+    so the index never needs a full rebuild.
+    """
+
+    def __init__(self, cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self._items: Dict[Hashable, Tuple[float, float, dict]] = {}
+        self._cells: Dict[Tuple[int, int], set] = {}
+        # Bounding box of cells ever occupied (grow-only), caps ring expansion
+        self._bounds: Optional[List[int]] = None
+
+    @classmethod
+    def from_items(cls, items: Iterable[dict], cell_deg: float = 0.05, key: str = "id") -> "SpatialIndex":
+        index = cls(cell_deg)
+        for item in items:
+            lat, lng = coords_of(item)
+            index.upsert(item[key], lat, lng, item)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._items
+
+    def get(self, item_id: Hashable) -> Optional[dict]:
+        entry = self._items.get(item_id)
+        return entry[2] if entry else None
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (int(math.floor(lat / self.cell_deg)), int(math.floor(lng / self.cell_deg)))
+
+    # ---------- incremental updates ----------
+
+    def upsert(self, item_id: Hashable, lat: float, lng: float, payload: dict = None):
+        """Insert or move an item; only its old and new buckets are touched."""
+        old = self._items.get(item_id)
+        new_cell = self._cell(lat, lng)
+        if old is not None:
+            old_cell = self._cell(old[0], old[1])
+            if old_cell != new_cell:
+                self._discard_from_cell(old_cell, item_id)
+        self._items[item_id] = (lat, lng, payload if payload is not None else {})
+        self._cells.setdefault(new_cell, set()).add(item_id)
+
+        i, j = new_cell
+        if self._bounds is None:
+            self._bounds = [i, i, j, j]
+        else:
+            bounds = self._bounds
+            bounds[0], bounds[1] = min(bounds[0], i), max(bounds[1], i)
+            bounds[2], bounds[3] = min(bounds[2], j), max(bounds[3], j)
+
+    def remove(self, item_id: Hashable):
+        old = self._items.pop(item_id, None)
+        if old is not None:
+            self._discard_from_cell(self._cell(old[0], old[1]), item_id)
+
+    def sync(self, items: Iterable[dict], key: str = "id"):
+        """Bring the index in line with `items`: upsert present ones, drop the rest."""
+        seen = set()
+        for item in items:
+            lat, lng = coords_of(item)
+            self.upsert(item[key], lat, lng, item)
+            seen.add(item[key])
+        for item_id in [i for i in self._items if i not in seen]:
+            self.remove(item_id)
+
+    def _discard_from_cell(self, cell: Tuple[int, int], item_id: Hashable):
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(item_id)
+            if not bucket:
+                del self._cells[cell]
+
+    # ---------- queries ----------
+
+    def _ring(self, center: Tuple[int, int], radius: int):
+        ci, cj = center
+        if radius == 0:
+            yield center
+            return
+        for dj in range(-radius, radius + 1):
+            yield (ci - radius, cj + dj)
+            yield (ci + radius, cj + dj)
+        for di in range(-radius + 1, radius):
+            yield (ci + di, cj - radius)
+            yield (ci + di, cj + radius)
+
+    def _ring_width_km(self, lat: float) -> float:
+        """Lower bound on the distance covered by one ring of cells."""
+        return self.cell_deg * KM_PER_DEG_LAT * max(math.cos(math.radians(min(abs(lat), 89.0))), 0.01)
+
+    def _max_ring(self, center: Tuple[int, int]) -> int:
+        """Ring that reaches the farthest occupied cell."""
+        if self._bounds is None:
+            return 0
+        min_i, max_i, min_j, max_j = self._bounds
+        ci, cj = center
+        return max(abs(min_i - ci), abs(max_i - ci), abs(min_j - cj), abs(max_j - cj))
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 1,
+        max_radius_km: float = None,
+        predicate: Callable[[dict], bool] = None,
+    ) -> List[Tuple[float, dict]]:
+        """
+        k nearest items as (distance_km, payload), closest first.
+        `predicate` filters payloads (e.g. beds available, unit is free).
+        """
+        if k <= 0 or not self._items:
+            return []
+
+        center = self._cell(lat, lng)
+        ring_km = self._ring_width_km(lat)
+        last_ring = self._max_ring(center)
+        if max_radius_km is not None:
+            last_ring = min(last_ring, int(max_radius_km / ring_km) + 1)
+
+        found: List[Tuple[float, dict]] = []
+        for radius in range(last_ring + 1):
+            for cell in self._ring(center, radius):
+                for item_id in self._cells.get(cell, ()):
+                    item_lat, item_lng, payload = self._items[item_id]
+                    if predicate is not None and not predicate(payload):
+                        continue
+                    distance = haversine_km(lat, lng, item_lat, item_lng)
+                    if max_radius_km is not None and distance > max_radius_km:
+                        continue
+                    found.append((distance, payload))
+
+            # Anything outside ring `radius` is at least radius * ring_km away
+            if len(found) >= k:
+                found.sort(key=lambda x: x[0])
+                if found[k - 1][0] <= radius * ring_km:
+                    break
+
+        found.sort(key=lambda x: x[0])
+        return found[:k]
+
+    def within_radius(
+        self,
+        lat: float,
+        lng: float,
+        radius_km: float,
+        predicate: Callable[[dict], bool] = None,
+    ) -> List[Tuple[float, dict]]:
+        """All items within radius_km as (distance_km, payload), closest first."""
+        return self.nearest(lat, lng, k=len(self._items), max_radius_km=radius_km, predicate=predicate)
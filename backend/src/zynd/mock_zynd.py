@@ -1,25 +1,65 @@
 # src/mock_zynd.py
+import asyncio
+import time
 from typing import Any, Callable, Dict
 
+from src.services.agent_log_writer import agent_log_writer
+from src.services.metrics import AGENT_CALLS, AGENT_ERRORS, AGENT_LATENCY
+
 class MockZyndRegistry:
     """
     Minimal in-process stand‑in for Zynd Protocol.
     You can later swap this for the real Zynd SDK client.
+    Every call, including ones cancelled by a stage deadline, is counted
+    and timed per DID and outcome, and handed to `recorder`
+    (the AgentLog write-behind queue).
     """
-    def __init__(self):
+    def __init__(self, recorder=None):
         self._agents: Dict[str, Callable[[dict], Any]] = {}
+        self._names: Dict[str, str] = {}
+        self.recorder = recorder
 
-    def register_agent(self, did: str, handler: Callable[[dict], Any]):
+    def register_agent(self, did: str, handler: Callable[[dict], Any], name: str = None):
         self._agents[did] = handler
+        self._names[did] = name
 
-    async def call(self, did: str, payload: dict):
+    async def call(self, did: str, payload: dict, emergency_id: int = None):
         if did not in self._agents:
             raise ValueError(f"Agent with DID {did} not registered")
         handler = self._agents[did]
-        result = handler(payload)
-        if hasattr(result, "__await__"):
-            return await result
+        started = time.perf_counter()
+        try:
+            result = handler(payload)
+            if hasattr(result, "__await__"):
+                result = await result
+        except (Exception, asyncio.CancelledError) as e:
+            # CancelledError: cut off by a stage deadline - exactly the slow calls to keep
+            self._record(did, payload, None, started, emergency_id, e)
+            raise
+        self._record(did, payload, result, started, emergency_id)
         return result
 
+    def _record(self, did, payload, result, started, emergency_id, error=None):
+        elapsed = time.perf_counter() - started
+        if error is None:
+            outcome = "ok"
+        elif isinstance(error, asyncio.CancelledError):
+            outcome = "cancelled"
+        else:
+            outcome = "error"
+            AGENT_ERRORS.inc(did)
+        AGENT_CALLS.inc(did, outcome)
+        AGENT_LATENCY.observe(elapsed, did, outcome)
+        if self.recorder is not None:
+            self.recorder.record(
+                did,
+                self._names.get(did),
+                payload,
+                result,
+                elapsed * 1000,
+                emergency_id=emergency_id,
+                error=error,
+            )
+
 
-zynd_registry = MockZyndRegistry()
+zynd_registry = MockZyndRegistry(recorder=agent_log_writer)
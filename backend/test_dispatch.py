@@ -0,0 +1,51 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from src.services.dispatch import INFEASIBLE, hungarian
+
+
+def brute_force_cost(cost: np.ndarray) -> float:
+    """Cheapest assignment of min(n, m) rows to distinct columns, by enumeration."""
+    n, m = cost.shape
+    if n > m:
+        return brute_force_cost(cost.T)
+    return min(
+        sum(cost[row, col] for row, col in enumerate(cols))
+        for cols in itertools.permutations(range(m), n)
+    )
+
+
+def random_cost(rng: random.Random, n: int, m: int) -> np.ndarray:
+    # ETA-like minutes, with some pairs outside a request's shortlist
+    return np.array([
+        [INFEASIBLE if rng.random() < 0.3 else round(rng.uniform(1, 60), 1) for _ in range(m)]
+        for _ in range(n)
+    ])
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_hungarian_matches_brute_force(seed):
+    rng = random.Random(seed)
+    cost = random_cost(rng, rng.randint(1, 6), rng.randint(1, 6))
+
+    rows, cols = hungarian(cost)
+
+    assert len(rows) == len(cols) == min(cost.shape)
+    assert len(set(rows.tolist())) == len(rows)
+    assert len(set(cols.tolist())) == len(cols)
+    assert list(rows) == sorted(rows)
+    assert cost[rows, cols].sum() == pytest.approx(brute_force_cost(cost))
+
+
+def test_hungarian_avoids_infeasible_pairs_when_possible():
+    cost = np.array([
+        [1.0, INFEASIBLE, INFEASIBLE],
+        [2.0, 3.0, INFEASIBLE],
+    ])
+
+    rows, cols = hungarian(cost)
+
+    assert list(zip(rows.tolist(), cols.tolist())) == [(0, 0), (1, 1)]
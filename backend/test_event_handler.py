@@ -0,0 +1,39 @@
+import asyncio
+
+from src.orchestrator import event_handler
+from src.orchestrator.event_handler import orchestrator
+
+TRIAGE = {"severity": "RED", "priority": 1, "recommended_specialists": ["trauma_surgeon"]}
+PAYLOAD = {
+    "symptoms": "severe bleeding",
+    "age": "40-45",
+    "location": {"lat": 28.61, "lng": 77.21},
+    "candidate_hospitals": [],
+}
+
+
+def test_precomputed_triage_and_assignment_are_reused(monkeypatch):
+    called = []
+
+    async def call(did, payload, emergency_id=None):
+        called.append(did)
+        return {"name": "AIIMS"}
+
+    def request(*args, **kwargs):
+        raise AssertionError("dispatch was requested twice")
+
+    monkeypatch.setattr(orchestrator.workflow.registry, "call", call)
+    monkeypatch.setattr(event_handler.dispatch_engine, "request", request)
+
+    async def run():
+        assignment = asyncio.get_running_loop().create_future()
+        assignment.set_result({"ambulance_id": "AMB-001", "eta_min": 6.0, "distance_km": 2.4})
+        return await orchestrator.handle_emergency(41, PAYLOAD, TRIAGE, assignment)
+
+    result = asyncio.run(run())
+
+    assert orchestrator.triage_did not in called
+    assert result["triage"] is TRIAGE
+    assert result["stage_timings"]["triage"]["status"] == "provided"
+    assert result["stage_timings"]["dispatch"]["status"] == "ok"
+    assert result["notification"] == {"name": "AIIMS"}
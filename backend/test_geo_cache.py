@@ -0,0 +1,55 @@
+import asyncio
+
+from src.services.geo_cache import GeoCache
+
+HOSPITAL = (28.5672, 77.2100)
+
+
+class NoReads:
+    """Stands in for the read connection once the cache is started."""
+
+    def execute(self, *args, **kwargs):
+        raise AssertionError("sqlite read on the request path")
+
+    def close(self):
+        pass
+
+
+def origin(i: int) -> tuple:
+    return (28.60 + i * 0.01, 77.20)
+
+
+def test_started_cache_serves_persisted_entries_from_memory(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = GeoCache("route", max_entries=3, sqlite_path=path)
+    for i in range(5):
+        cache.put(origin(i), HOSPITAL, {"i": i})
+    cache.close()
+
+    cache = GeoCache("route", max_entries=3, sqlite_path=path)
+    cache.put(origin(9), HOSPITAL, {"i": 9})
+
+    async def run():
+        await cache.start(flush_interval_s=60)
+        disk, cache._db = cache._db, NoReads()
+        try:
+            return [cache.get(origin(i), HOSPITAL) for i in (0, 3, 4, 9)]
+        finally:
+            cache._db = disk
+            await cache.stop()
+
+    # The freshest persisted rows fill what the new entry leaves of the LRU
+    assert asyncio.run(run()) == [None, {"i": 3}, {"i": 4}, {"i": 9}]
+    cache.close()
+
+
+def test_unstarted_cache_reads_through_to_disk(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = GeoCache("route", sqlite_path=path)
+    cache.put(origin(0), HOSPITAL, {"i": 0})
+    cache.close()
+
+    cache = GeoCache("route", sqlite_path=path)
+    assert cache.get(origin(0), HOSPITAL) == {"i": 0}
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
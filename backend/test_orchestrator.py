@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.orchestrator import orchestrator as orchestrator_module
+from src.orchestrator.orchestrator import orchestrator
+
+HOSPITAL = {
+    "id": 3,
+    "name": "AIIMS",
+    "route_info": {"distance_km": 4.2, "duration_min": 11},
+}
+
+
+class FakeWorkflow:
+    """Fills the context the way a successful StageExecutor run would."""
+
+    async def run(self, ctx, deadline_s, **kwargs):
+        ctx.update(
+            address="Ansari Nagar, New Delhi",
+            triage={"severity": "RED", "priority": 1},
+            hospitals=[HOSPITAL],
+            routing=HOSPITAL,
+        )
+        return {}
+
+
+def legacy_request():
+    return SimpleNamespace(
+        location=SimpleNamespace(lat=28.61, lng=77.21),
+        symptoms=["chest_pain"],
+        vitals={},
+        age=65,
+        description="Collapsed at home",
+        contact_email="family@example.com",
+    )
+
+
+def test_handle_emergency_without_background_tasks(monkeypatch):
+    sent = []
+
+    async def call(did, payload, *args, **kwargs):
+        sent.append((did, payload))
+
+    monkeypatch.setattr(orchestrator, "workflow", FakeWorkflow())
+    monkeypatch.setattr(orchestrator_module.zynd_registry, "call", call)
+
+    async def run():
+        # WebSocket callers pass background_tasks=None
+        response = await orchestrator.handle_emergency(legacy_request(), background_tasks=None)
+        await asyncio.gather(*orchestrator._background)
+        return response
+
+    response = asyncio.run(run())
+
+    assert response["assigned_hospital"] == "AIIMS"
+    [(did, notification)] = sent
+    assert did == orchestrator.notification_did
+    assert notification["emergency_data"]["address"] == "Ansari Nagar, New Delhi"
+    assert notification["hospital_data"] == HOSPITAL
@@ -0,0 +1,29 @@
+import pytest
+
+from src.services.road_graph import RoadGraph
+
+# A short chain of streets in central Delhi
+CHAIN = [(28.600, 77.200), (28.605, 77.200), (28.610, 77.200), (28.615, 77.200)]
+
+
+@pytest.fixture
+def graph():
+    return RoadGraph.from_edges(CHAIN[:-1], CHAIN[1:])
+
+
+def test_table_aligns_legs_with_destinations(graph):
+    legs = graph.table(CHAIN[0], [CHAIN[3], (19.07, 72.88), CHAIN[1]])
+
+    assert len(legs) == 3
+    assert legs[0]["distance_km"] > legs[2]["distance_km"] > 0
+    assert legs[1] is None  # Mumbai is far off this graph
+
+
+def test_table_without_snappable_destinations_skips_search(graph, monkeypatch):
+    def search(*args, **kwargs):
+        raise AssertionError("searched with no targets")
+
+    monkeypatch.setattr(graph, "_search", search)
+
+    assert graph.table(CHAIN[0], [(19.07, 72.88), (12.97, 77.59)]) == [None, None]
+    assert graph.table(CHAIN[0], []) == []
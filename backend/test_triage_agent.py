@@ -0,0 +1,59 @@
+import pytest
+
+from src.agents.triage_agent import TriageAgent, parse_age, symptom_text
+
+
+@pytest.fixture(scope="module")
+def agent():
+    return TriageAgent()
+
+
+@pytest.mark.parametrize("age, expected", [
+    (65, 65),
+    (72.9, 72),
+    ("50", 50),
+    ("40-45", 40),
+    ("60+", 60),
+    ("unknown", 0),
+    ("", 0),
+    (None, 0),
+])
+def test_parse_age(age, expected):
+    assert parse_age(age) == expected
+
+
+@pytest.mark.parametrize("symptoms, expected", [
+    ("Chest pain", "chest_pain"),
+    ("  severe-bleeding ", "severe_bleeding"),
+    (["chest_pain", "fever"], "chest_pain_fever"),
+    ([], ""),
+    (None, ""),
+])
+def test_symptom_text(symptoms, expected):
+    assert symptom_text(symptoms) == expected
+
+
+def test_frontend_payload(agent):
+    # TriageInput: free-text symptoms, age band as a string
+    result = agent.execute({
+        "symptoms": "Chest pain",
+        "age": "60+",
+        "vitals": {"bloodPressure": "180/100", "heartRate": 120, "oxygenLevel": 92},
+    })
+    assert result["severity"] == "RED"
+    assert result["recommended_specialists"] == ["cardiologist", "emergency_physician"]
+
+
+def test_legacy_payload(agent):
+    # EmergencyRequest: list of symptom ids, integer age, free-form vitals
+    result = agent.execute({
+        "symptoms": ["fever"],
+        "age": 30,
+        "vitals": {"bp": "120/80", "heart_rate": 90},
+    })
+    assert result["severity"] == "YELLOW"
+    assert result["priority"] == 2
+
+
+def test_missing_fields_are_routine(agent):
+    assert agent.execute({})["severity"] == "GREEN"
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from src.agents.triage_agent import TriageAgent
+
+SYMPTOMS = [
+    "Chest pain", "chest_pain", "chest-pain", "severe bleeding", "Fracture of left arm",
+    "fever", "moderate pain", "dizziness", "", "  CHEST PAIN and fever  ",
+]
+AGES = [5, 40, 59, 60, 85, "60", "60+", "40-45", "0-18", "unknown", None, 72.9]
+
+
+def without_timestamp(result: dict) -> dict:
+    return {key: value for key, value in result.items() if key != "timestamp"}
+
+
+def random_payload(rng: random.Random) -> dict:
+    picked = rng.sample(SYMPTOMS, rng.randint(0, 3))
+    # Frontend forms send one free-text string, the legacy API a list of ids
+    symptoms = ", ".join(picked) if rng.random() < 0.5 else picked
+    return {"symptoms": symptoms, "age": rng.choice(AGES), "vitals": {}}
+
+
+@pytest.fixture(scope="module")
+def agent():
+    return TriageAgent()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_classify_batch_matches_execute(agent, seed):
+    rng = random.Random(seed)
+    payloads = [random_payload(rng) for _ in range(400)]
+
+    batch = [without_timestamp(r) for r in agent.classify_batch(payloads)]
+    assert batch == [without_timestamp(agent.execute(p)) for p in payloads]
+
+
+@pytest.mark.parametrize("payload, severity", [
+    ({"symptoms": "chest pain", "age": 65}, "RED"),
+    ({"symptoms": ["chest_pain"], "age": "60+"}, "RED"),
+    ({"symptoms": "chest pain", "age": 40}, "GREEN"),
+    ({"symptoms": "chest pain, fever", "age": 40}, "YELLOW"),
+    ({"symptoms": ["fracture"], "age": None}, "RED"),
+    ({"symptoms": [], "age": 30}, "GREEN"),
+])
+def test_classify_batch_known_cases(agent, payload, severity):
+    assert agent.classify_batch([payload])[0]["severity"] == severity
+    assert agent.execute(payload)["severity"] == severity
+
+
+def test_classify_batch_empty(agent):
+    assert agent.classify_batch([]) == []
@@ -0,0 +1,52 @@
+import asyncio
+
+from fastapi import BackgroundTasks
+
+from src.api import routes
+from src.models.schemas import TriageInput
+from src.orchestrator.event_handler import orchestrator as event_orchestrator
+
+HOSPITAL = {"id": 3, "name": "AIIMS", "coords": [28.5672, 77.2100]}
+
+
+class FakeSession:
+    """Stands in for AsyncSession: the row gets an id when added."""
+
+    def __init__(self, emergency_id: int):
+        self.emergency_id = emergency_id
+        self.added = []
+
+    def add(self, row):
+        row.id = self.emergency_id
+        self.added.append(row)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+def test_triage_schedules_event_orchestrator(monkeypatch):
+    monkeypatch.setattr(routes.hospital_registry, "nearest", lambda lat, lng, **kw: [(2.1, HOSPITAL)])
+    request = TriageInput(
+        patientName="Test Patient",
+        age="60+",
+        gender="female",
+        contact="9999999999",
+        vitals={"bloodPressure": "120/80", "heartRate": 90, "oxygenLevel": 97},
+        symptoms="Chest pain",
+        location={"lat": 28.61, "lng": 77.21},
+    )
+    background_tasks = BackgroundTasks()
+
+    response = asyncio.run(routes.triage_emergency(request, background_tasks, FakeSession(7)))
+
+    assert response["emergencyId"] == 7
+    [task] = background_tasks.tasks
+    # The event-driven flow takes (emergency_id, payload) positionally
+    assert task.func == event_orchestrator.handle_emergency
+    emergency_id, payload = task.args
+    assert emergency_id == 7
+    assert payload["location"] == {"lat": 28.61, "lng": 77.21}
+    assert payload["candidate_hospitals"] == [HOSPITAL]
@@ -0,0 +1,45 @@
+import asyncio
+import json
+from datetime import datetime
+
+from src.api import websocket as websocket_module
+from src.api.websocket import manager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text: str):
+        self.sent.append(text)
+
+
+def test_send_message_encodes_datetimes():
+    websocket = FakeWebSocket()
+    # Hospital records from the registry carry updated_at datetimes
+    message = {"status": "completed", "data": {"updated_at": datetime(2026, 1, 2, 3, 4, 5)}}
+
+    asyncio.run(manager.send_message(websocket, message))
+
+    [text] = websocket.sent
+    assert json.loads(text) == {"status": "completed", "data": {"updated_at": "2026-01-02T03:04:05"}}
+
+
+class ClosedWebSocket:
+    async def send_text(self, text: str):
+        raise RuntimeError('Cannot call "send" once a close message has been sent.')
+
+
+def test_send_message_to_closed_socket_returns_false():
+    assert asyncio.run(manager.send_message(ClosedWebSocket(), {"status": "error"})) is False
+
+
+def test_failed_request_after_sender_left_is_contained(monkeypatch):
+    async def handle_emergency(*args, **kwargs):
+        raise ValueError("no hospitals")
+
+    monkeypatch.setattr(websocket_module.orchestrator, "handle_emergency", handle_emergency)
+    # Never subscribed to the topic, as after its receive loop has ended
+    websocket = ClosedWebSocket()
+
+    asyncio.run(websocket_module.handle_request(websocket, "42", {"requestId": "r1"}))